@@ -0,0 +1,38 @@
+"""Micro-benchmark: per-request URL building, eval'd f-string vs cached endpoints.
+
+Run from the repository root: python benchmarks/bench_endpoints.py
+"""
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "custom_components" / "redback"))
+
+from redbacklib import buildEndpoints  # noqa: E402
+
+NUMBER = 100_000
+
+
+class Before:
+    """The previous approach: eval an f-string on every request"""
+
+    siteId = "S1234123412341"
+    _template = "https://api.redbacktech.com/Api/v2.21/EnergyData/{self.siteId}/Dynamic?metadata=true"
+
+    def url(self):
+        full_url = self._template
+        return eval(f"f'{full_url}'")
+
+
+def main():
+    before = Before()
+    before_s = timeit.timeit(before.url, number=NUMBER)
+    after_s = timeit.timeit(lambda: buildEndpoints("S1234123412341")["public_DynamicData"], number=NUMBER)
+
+    print(f"eval f-string   : {before_s / NUMBER * 1e6:8.2f} us/request")
+    print(f"cached endpoint : {after_s / NUMBER * 1e6:8.2f} us/request")
+    print(f"speed-up        : {before_s / after_s:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
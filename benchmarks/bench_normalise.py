@@ -0,0 +1,77 @@
+"""Benchmark: dynamic data normalisation, previous multi-pass code vs normaliseDynamicData.
+
+Run from the repository root: python benchmarks/bench_normalise.py
+"""
+import asyncio
+import copy
+import sys
+import timeit
+from math import sqrt
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "custom_components" / "redback"))
+
+from redbacklib import TestRedbackInverter, normaliseDynamicData  # noqa: E402
+
+NUMBER = 20_000
+REPEAT = 5
+
+
+def legacy(energyData):
+    """The previous getEnergyData() processing, kept here for comparison"""
+    for key in energyData:
+        if energyData[key] == None: energyData[key] = 0
+    for phase in energyData["Phases"]:
+        for key in phase:
+            if phase[key] == None: phase[key] = 0
+    for phase in energyData["Phases"]:
+        energyData["VoltageInstantaneousV_" + phase["Id"]] = phase["VoltageInstantaneousV"]
+        energyData["CurrentInstantaneousA_" + phase["Id"]] = phase["CurrentInstantaneousA"]
+    phaseCount = len(energyData["Phases"])
+    energyData["VoltageInstantaneousV"] = round( sum(list(map(lambda x: x["VoltageInstantaneousV"], energyData["Phases"]))) / phaseCount * sqrt(phaseCount), 1)
+    energyData["ActiveExportedPowerInstantaneouskW"] = sum(list(map(lambda x: x["ActiveExportedPowerInstantaneouskW"], energyData["Phases"])))
+    energyData["ActiveImportedPowerInstantaneouskW"] = sum(list(map(lambda x: x["ActiveImportedPowerInstantaneouskW"], energyData["Phases"])))
+    if "Battery" in energyData:
+        energyData["BatteryCurrentNegativeIsChargingA"] = energyData["Battery"]["CurrentNegativeIsChargingA"]
+        energyData["BatteryVoltageV"] =  energyData["Battery"]["VoltageV"]
+    if "PVs" in energyData:
+        for counter, PV in enumerate(energyData["PVs"]):
+            energyData["PV_" + str(counter) + "_VoltageV"] = PV["VoltageV"]
+            energyData["PV_" + str(counter) + "_CurrentA"] = PV["CurrentA"]
+            energyData["PV_" + str(counter) + "_PowerkW"] = PV["PowerkW"]
+    del energyData["SiteId"]
+    del energyData["Inverters"]
+    del energyData["Phases"]
+    del energyData["Battery"]
+    del energyData["PVs"]
+    return energyData
+
+
+def main():
+    inverter = TestRedbackInverter("id", "secret", "public", None)
+    sample = asyncio.run(inverter._apiRequest("public_DynamicData"))["Data"]
+
+    def best(function):
+        # each call is given a fresh copy, as the legacy code mutates its input
+        timings = []
+        for _ in range(REPEAT):
+            copies = [copy.deepcopy(sample) for _ in range(NUMBER)]
+            timings.append(timeit.timeit(lambda: function(copies.pop()), number=NUMBER))
+        return min(timings)
+
+    legacy_s = best(legacy)
+    snapshot_s = best(normaliseDynamicData)
+    # the per-phase analytics are only worked out when an enabled sensor reads them
+    analytics_s = best(lambda data: normaliseDynamicData(data).analytics)
+
+    before = legacy(copy.deepcopy(sample))
+    after = normaliseDynamicData(copy.deepcopy(sample))
+    assert {key: after[key] for key in before} == before, "normalised keys differ from the legacy output"
+
+    print(f"legacy multi-pass : {legacy_s / NUMBER * 1e6:8.2f} us/record")
+    print(f"single-pass       : {snapshot_s / NUMBER * 1e6:8.2f} us/record")
+    print(f"  + analytics     : {analytics_s / NUMBER * 1e6:8.2f} us/record")
+
+
+if __name__ == "__main__":
+    main()
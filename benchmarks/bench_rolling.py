@@ -0,0 +1,97 @@
+"""Benchmark: rolling power statistics, recomputing over kept snapshots vs RedbackRollingStats.
+
+Run from the repository root: python benchmarks/bench_rolling.py
+"""
+import asyncio
+import sys
+import timeit
+import tracemalloc
+from collections import deque
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "custom_components" / "redback"))
+
+from redbacklib import TestRedbackInverter, normaliseDynamicData  # noqa: E402
+from window import SERIES, WINDOWS, RedbackRollingStats  # noqa: E402
+
+NUMBER = 20_000
+REPEAT = 5
+# seconds between snapshots (the cloud uploads once a minute, the fastest poll is 30s)
+INTERVAL = 30
+
+
+class Recompute:
+    """Keep the snapshots of the longest window and recompute every statistic, kept here for comparison"""
+
+    def __init__(self):
+        self.snapshots = deque()
+
+    def add(self, timestamp, ed):
+        self.snapshots.append((timestamp, ed))
+        while self.snapshots[0][0] <= timestamp - max(WINDOWS.values()):
+            self.snapshots.popleft()
+        results = {}
+        for series, extract in SERIES.items():
+            for window, duration in WINDOWS.items():
+                values = [extract(ed) for t, ed in self.snapshots if t > timestamp - duration]
+                results[(series, window)] = (sum(values) / len(values), min(values), max(values))
+        return results
+
+
+def main():
+    inverter = TestRedbackInverter("id", "secret", "public", None)
+    raw = asyncio.run(inverter._apiRequest("public_DynamicData"))["Data"]
+
+    def snapshot(n):
+        # varying power readings
+        data = dict(raw)
+        data["Phases"] = [dict(phase, ActiveExportedPowerInstantaneouskW=(n % 97) / 10) for phase in raw["Phases"]]
+        data["PvPowerInstantaneouskW"] = (n % 113) / 10
+        return normaliseDynamicData(data)
+
+    # a day of snapshots
+    snapshots = [snapshot(n) for n in range(2880)]
+
+    def memory(factory):
+        # size of a site's state (including any snapshots it keeps) after the longest window has filled up
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        state = factory()
+        for n in range(len(snapshots)):
+            state.add(n * INTERVAL, snapshot(n))
+        size = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, "filename"))
+        tracemalloc.stop()
+        return size
+
+    def best(factory):
+        timings = []
+        for _ in range(REPEAT):
+            state = factory()
+            count = iter(range(NUMBER))
+            timings.append(timeit.timeit(
+                lambda: (n := next(count), state.add(n * INTERVAL, snapshots[n % len(snapshots)])),
+                number=NUMBER,
+            ))
+        return min(timings)
+
+    recompute_b = memory(Recompute)
+    rolling_b = memory(RedbackRollingStats)
+    recompute_s = best(Recompute)
+    rolling_s = best(RedbackRollingStats)
+
+    rolling = RedbackRollingStats()
+    recompute = Recompute()
+    for n, ed in enumerate(snapshots):
+        rolling.add(n * INTERVAL, ed)
+        expected = recompute.add(n * INTERVAL, ed)
+    for (series, window), (mean, minimum, maximum) in expected.items():
+        assert abs(rolling.get(series, window, "mean") - mean) < 1e-9, (series, window)
+        assert rolling.get(series, window, "minimum") == minimum, (series, window)
+        assert rolling.get(series, window, "maximum") == maximum, (series, window)
+
+    print(f"recompute over snapshots : {recompute_s / NUMBER * 1e6:8.2f} us/update {recompute_b / 1024:8.1f} KiB/site")
+    print(f"rolling windows          : {rolling_s / NUMBER * 1e6:8.2f} us/update {rolling_b / 1024:8.1f} KiB/site")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,28 @@ from __future__ import annotations
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
+from homeassistant.helpers.typing import ConfigType
+from homeassistant.helpers.update_coordinator import UpdateFailed
+import homeassistant.helpers.config_validation as cv
 
 from .const import DOMAIN, PLATFORMS, LOGGER
-from .coordinator import RedbackDataUpdateCoordinator
+from .coordinator import (
+    RedbackDataUpdateCoordinator,
+    async_get_account_coordinator,
+    async_release_account_coordinator,
+    async_remove_metadata_store,
+)
+from .integration import async_remove_energy_store
+from .services import async_setup_services
+from .tokens import async_attach_token_store
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Redback services."""
+    async_setup_services(hass)
+    return True
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Redback from a config entry."""
@@ -16,22 +35,69 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # 1. calls into Redback API every SCAN_INTERVAL to download and refresh data cache
     # 2. then calls each entity to update its own data from cache
     coordinator = RedbackDataUpdateCoordinator(hass, entry)
-    await coordinator.async_config_entry_first_refresh()
+    # a bearer token saved by a previous run saves an auth round trip
+    await async_attach_token_store(hass, coordinator.redback, entry.data["client_id"], entry.data["auth"])
+
+    # site ID, inverter info and entity layout saved by a previous run let the
+    # entities be set up straight away, without waiting for the cloud
+    restored = await coordinator.async_load_metadata()
+
+    # Public API sites sharing the same credentials are polled together by one
+    # account coordinator, which also discovers the account's sites just once
+    account = None
+    if not coordinator.redback.isPrivateAPI():
+        account = async_get_account_coordinator(hass, entry)
+        try:
+            await account.async_add_site(coordinator)
+        except UpdateFailed as err:
+            await async_release_account_coordinator(hass, entry)
+            raise ConfigEntryNotReady(err) from err
+        except ConfigEntryAuthFailed:
+            await async_release_account_coordinator(hass, entry)
+            raise
+
+    if restored:
+        # the first data arrives in the background (sites of one account are batched)
+        entry.async_create_background_task(
+            hass,
+            account.async_request_refresh() if account else coordinator.async_refresh(),
+            f"{DOMAIN} first refresh {entry.entry_id}",
+        )
+    else:
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except Exception:
+            await async_release_account_coordinator(hass, entry)
+            raise
     hass.data[DOMAIN][entry.entry_id] = coordinator
 
     LOGGER.debug("New Redback integration is setup (entry_id=%s)", entry.entry_id)
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    # refresh tiers are set when the coordinator is created, so apply new options by reloading
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
     return True
 
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload Redback config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload Redback config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await coordinator.async_shutdown()
+        await async_release_account_coordinator(hass, entry)
 
     return unload_ok
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the stored metadata and energy accumulators of a removed Redback config entry."""
+    await async_remove_metadata_store(hass, entry)
+    await async_remove_energy_store(hass, entry)
+
 async def async_migrate_entry(hass, entry: ConfigEntry):
     """Migrate outdated Redback config entry."""
     LOGGER.debug("Migrating config entry from version %s", entry.version)
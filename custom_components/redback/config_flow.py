@@ -6,13 +6,29 @@ from typing import Any
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import (HomeAssistantError, ConfigEntryAuthFailed)
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
-from .const import LOGGER, DOMAIN, API_METHODS, TEST_MODE
+from .const import (
+    LOGGER,
+    DOMAIN,
+    API_METHODS,
+    TEST_MODE,
+    CONF_POLL_MIN_INTERVAL,
+    CONF_POLL_MAX_INTERVAL,
+    CONF_SLOW_INTERVAL,
+    CONF_STATIC_INTERVAL,
+    CONF_STALE_GRACE,
+    POLL_MIN_INTERVAL,
+    POLL_MAX_INTERVAL,
+    SLOW_INTERVAL,
+    STATIC_INTERVAL,
+    STALE_GRACE,
+)
 from .redbacklib import RedbackInverter, TestRedbackInverter, RedbackError, RedbackAPIError, RedbackConnectionError
+from .tokens import async_attach_token_store
 
 STEP_USER_DATA_SCHEMA = vol.Schema(
     {
@@ -47,6 +63,9 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
             auth=data["auth"], auth_id=data["client_id"], apimethod=data.get("apimethod","public"), session=clientsession, site_index=data["site_index"]
         )
 
+    # reuse a saved bearer token for these credentials, if there is one
+    await async_attach_token_store(hass, redback, data["client_id"], data["auth"])
+
     try:
         result = await redback.testConnection()
         assert result == True
@@ -76,6 +95,14 @@ class RedbackConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 2
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> RedbackOptionsFlow:
+        """Get the options flow for this handler."""
+        return RedbackOptionsFlow(config_entry)
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -138,6 +165,8 @@ class RedbackConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     auth=new["auth"], auth_id=new["client_id"], apimethod=new.get("apimethod","public"), session=clientsession, site_index=new["site_index"]
                 )
 
+            await async_attach_token_store(self.hass, redback, new["client_id"], new["auth"])
+
             try:
                 result = await redback.testConnection()
                 assert result == True
@@ -167,6 +196,41 @@ class RedbackConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             errors=errors,
         )
 
+class RedbackOptionsFlow(config_entries.OptionsFlow):
+    """Handle the refresh tiers (seconds) for a Redback config entry."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize the options flow."""
+        self._entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            if user_input[CONF_POLL_MAX_INTERVAL] < user_input[CONF_POLL_MIN_INTERVAL]:
+                errors["base"] = "max_below_min"
+            else:
+                return self.async_create_entry(title="", data=user_input)
+
+        options = self._entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema({
+                # fast tier: power values, polled with every cloud record while the site is active
+                vol.Required(CONF_POLL_MIN_INTERVAL, default=options.get(CONF_POLL_MIN_INTERVAL, POLL_MIN_INTERVAL)): vol.All(int, vol.Range(min=60, max=3600)),
+                vol.Required(CONF_POLL_MAX_INTERVAL, default=options.get(CONF_POLL_MAX_INTERVAL, POLL_MAX_INTERVAL)): vol.All(int, vol.Range(min=60, max=3600)),
+                # slow tier: temperature and frequency
+                vol.Required(CONF_SLOW_INTERVAL, default=options.get(CONF_SLOW_INTERVAL, SLOW_INTERVAL)): vol.All(int, vol.Range(min=60, max=3600)),
+                # static tier: inverter info
+                vol.Required(CONF_STATIC_INTERVAL, default=options.get(CONF_STATIC_INTERVAL, STATIC_INTERVAL)): vol.All(int, vol.Range(min=300, max=86400)),
+                # how long the last good data is served after a failed update (0 = not at all)
+                vol.Required(CONF_STALE_GRACE, default=options.get(CONF_STALE_GRACE, STALE_GRACE)): vol.All(int, vol.Range(min=0, max=86400)),
+            }),
+            errors=errors,
+        )
+
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
 
@@ -10,8 +10,71 @@ TEST_MODE = False
 
 LOGGER = logging.getLogger(__package__)
 SCAN_INTERVAL = timedelta(minutes=1)
+UPDATE_TIMEOUT = 45 # seconds, budget for all the requests of one update cycle
+
+# polls are phase-locked to the cloud's record uploads, see scheduler.py
+POLL_RETRY_INTERVAL = timedelta(seconds=10) # retry this soon when the record has not advanced yet
+POLL_MAX_RETRIES = 3
+POLL_MARGIN = timedelta(seconds=3) # poll this long after the next record should be available
+
+# adaptive polling: every record while the site is active, backing off to the ceiling while idle
+CONF_POLL_MIN_INTERVAL = "poll_min_interval"
+CONF_POLL_MAX_INTERVAL = "poll_max_interval"
+POLL_MIN_INTERVAL = 60 # seconds
+POLL_MAX_INTERVAL = 600 # seconds
+ACTIVITY_PV_THRESHOLD = 0.05 # kW of PV generation which counts as active
+ACTIVITY_CHANGE_THRESHOLD = 0.1 # kW change in any power reading which counts as active
+
+# refresh tiers (options flow): fast = power values (the poll intervals above),
+# slow = temperature and frequency entities, static = inverter info
+TIER_FAST = "fast"
+TIER_SLOW = "slow"
+CONF_SLOW_INTERVAL = "slow_interval"
+CONF_STATIC_INTERVAL = "static_interval"
+SLOW_INTERVAL = 300 # seconds
+STATIC_INTERVAL = 900 # seconds
+
+# after a failed update, the last good data is served for this long before entities become unavailable
+CONF_STALE_GRACE = "stale_grace"
+STALE_GRACE = 900 # seconds, 0 = no grace period
+
+# connections to the API are opened this long before each scheduled poll
+PREWARM_LEAD = timedelta(seconds=5)
+DATA_SESSION = "session"
+
+# sites sharing one set of credentials are polled together by an account coordinator
+DATA_ACCOUNTS = "accounts"
+ACCOUNT_CONCURRENCY = 4 # maximum simultaneous site requests per account
 
 API_METHODS = [
     "public",
     "private",
 ]
+
+# historical backfill of long-term statistics after a restart or cloud outage
+BACKFILL_GAP = timedelta(minutes=5) # backfill when consecutive records are further apart than this
+BACKFILL_MAX = timedelta(days=7) # never reach back further than this
+BACKFILL_BATCH = 24 # records (hours) per statistics import
+BACKFILL_CONCURRENCY = 4 # maximum simultaneous historical requests
+
+# site ID, inverter info and entity layout are stored so that startup needs no network
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 10 # seconds
+DATA_METADATA_STORES = "metadata_stores"
+MAX_PVS = 10 # PV strings supported per inverter
+LAYOUT_CONFIRM_RECORDS = 3 # a new entity layout must be seen in this many records in a row
+
+# energy integrated from power readings (private API, which has no all-time counters)
+ENERGY_MAX_GAP = timedelta(minutes=5) # longer gaps between samples only count for this long
+ENERGY_SAVE_DELAY = 60 # seconds, accumulators are saved at most this often
+DATA_ENERGY_STORES = "energy_stores"
+
+# OAuth2 bearer tokens are kept across restarts, see tokens.py
+PERSIST_TOKENS = True
+DATA_TOKENS = "tokens"
+TOKEN_STORAGE_VERSION = 1
+
+# redback.refresh service: concurrent calls share one refresh, and calls this soon
+# after the last refresh of a site are coalesced into it
+SERVICE_REFRESH = "refresh"
+REFRESH_MIN_INTERVAL = 10 # seconds
@@ -1,15 +1,123 @@
 """DataUpdateCoordinator for the Redback integration."""
 from __future__ import annotations
 
-from homeassistant.core import HomeAssistant
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import HomeAssistant, CALLBACK_TYPE, Event, callback
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.util import dt as dt_util
+from homeassistant.util.ssl import get_default_context
+
+from .const import (
+    DOMAIN,
+    LOGGER,
+    SCAN_INTERVAL,
+    UPDATE_TIMEOUT,
+    TEST_MODE,
+    DATA_ACCOUNTS,
+    ACCOUNT_CONCURRENCY,
+    POLL_RETRY_INTERVAL,
+    POLL_MAX_RETRIES,
+    POLL_MARGIN,
+    CONF_POLL_MIN_INTERVAL,
+    CONF_POLL_MAX_INTERVAL,
+    POLL_MIN_INTERVAL,
+    POLL_MAX_INTERVAL,
+    ACTIVITY_PV_THRESHOLD,
+    ACTIVITY_CHANGE_THRESHOLD,
+    TIER_FAST,
+    TIER_SLOW,
+    CONF_SLOW_INTERVAL,
+    CONF_STATIC_INTERVAL,
+    SLOW_INTERVAL,
+    STATIC_INTERVAL,
+    CONF_STALE_GRACE,
+    STALE_GRACE,
+    BACKFILL_GAP,
+    BACKFILL_MAX,
+    BACKFILL_BATCH,
+    BACKFILL_CONCURRENCY,
+    DATA_SESSION,
+    DATA_METADATA_STORES,
+    PREWARM_LEAD,
+    STORAGE_VERSION,
+    STORAGE_SAVE_DELAY,
+    MAX_PVS,
+    LAYOUT_CONFIRM_RECORDS,
+    REFRESH_MIN_INTERVAL,
+)
+from .redbacklib import RedbackInverter, TestRedbackInverter, RedbackError, RedbackAPIError, RedbackConnectionError, parseTimestamp, createSession, changedKeys, gatherRequests, RedbackSingleFlight
+from .scheduler import RedbackPollScheduler, site_is_active
+from .integration import RedbackEnergyStore
+from .window import RedbackRollingStats
+from .recorder_stats import RedbackStatisticsWriter, async_backfill_statistics, async_get_last_statistic_time
+
+
+def async_get_redback_session(hass: HomeAssistant):
+    """Return the integration's dedicated API session (DNS cache, keep-alive), creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (session := domain_data.get(DATA_SESSION)) is None:
+        session = domain_data[DATA_SESSION] = createSession(ssl=get_default_context())
+
+        async def _async_close(_event: Event) -> None:
+            await session.close()
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close)
+    return session
+
+
+def async_get_metadata_store(hass: HomeAssistant, entry: ConfigEntry) -> Store[dict]:
+    """Return the store holding a config entry's site ID, inverter info and entity layout.
+
+    There is one per entry, shared across reloads: a layout change reloads the entry
+    straight away, and the new layout (still waiting to be saved) is what it must load.
+    """
+    stores = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_METADATA_STORES, {})
+    if (store := stores.get(entry.entry_id)) is None:
+        store = stores[entry.entry_id] = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}")
+    return store
+
+
+async def async_remove_metadata_store(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete a removed config entry's stored metadata."""
+    await async_get_metadata_store(hass, entry).async_remove()
+    hass.data[DOMAIN][DATA_METADATA_STORES].pop(entry.entry_id)
 
-from .const import DOMAIN, LOGGER, SCAN_INTERVAL, TEST_MODE
-from .redbacklib import RedbackInverter, TestRedbackInverter, RedbackError, RedbackAPIError, RedbackConnectionError
+
+class RedbackPrewarmer:
+    """Opens the API connection shortly before each scheduled poll."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the prewarmer."""
+        self.hass = hass
+        self._unsub: CALLBACK_TYPE | None = None
+
+    def schedule(self, redback: RedbackInverter, delay: timedelta) -> None:
+        """Warm the connection PREWARM_LEAD before a poll which is delay away."""
+        self.cancel()
+        # no point warming a connection which is about to be used anyway
+        if delay <= 2 * PREWARM_LEAD:
+            return
+
+        async def _async_warm(_now: datetime) -> None:
+            self._unsub = None
+            await redback.warmConnection()
+
+        self._unsub = async_call_later(self.hass, delay - PREWARM_LEAD, _async_warm)
+
+    def cancel(self) -> None:
+        """Cancel any scheduled prewarm."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
 
 
 class RedbackDataUpdateCoordinator(DataUpdateCoordinator):
@@ -20,19 +128,76 @@ class RedbackDataUpdateCoordinator(DataUpdateCoordinator):
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
         """Initialize the Redback coordinator."""
         self.config_entry = entry
-        clientsession = async_get_clientsession(hass)
+        clientsession = async_get_redback_session(hass)
+        # static tier: how long inverter info is cached for
+        static_interval = entry.options.get(CONF_STATIC_INTERVAL, STATIC_INTERVAL)
+        cache_settings = {"static": (static_interval, 300, max(static_interval, 3600))}
 
         # RedbackInverter is the API connection to the Redback cloud portal
         if TEST_MODE:
             self.redback = TestRedbackInverter(
-                auth=entry.data["auth"], auth_id=entry.data["client_id"], apimethod=entry.data.get("apimethod","public"), session=clientsession, site_index=entry.data["site_index"]
+                auth=entry.data["auth"], auth_id=entry.data["client_id"], apimethod=entry.data.get("apimethod","public"), session=clientsession, site_index=entry.data["site_index"], cache_settings=cache_settings
             )
         else:
             self.redback = RedbackInverter(
-                auth=entry.data["auth"], auth_id=entry.data["client_id"], apimethod=entry.data.get("apimethod","public"), session=clientsession, site_index=entry.data["site_index"]
+                auth=entry.data["auth"], auth_id=entry.data["client_id"], apimethod=entry.data.get("apimethod","public"), session=clientsession, site_index=entry.data["site_index"], cache_settings=cache_settings
             )
 
-        super().__init__(hass, LOGGER, name=DOMAIN, update_interval=SCAN_INTERVAL)
+        # site ID, inverter info and entity layout from the last run, so startup needs no network
+        self._store = async_get_metadata_store(hass, entry)
+        self._stored: dict | None = None
+        self.layout: dict | None = None
+        self._pending_layout: dict | None = None
+        self._pending_layout_count = 0
+        self.energy_data = None
+
+        self._last_timestamp: datetime | None = None
+        self._backfill_task: asyncio.Task | None = None
+        self._statistics: RedbackStatisticsWriter | None = None
+        # accumulators for energy integrated from power readings, where there is no counter
+        self.energy_store = RedbackEnergyStore(hass, entry)
+        # rolling averages, minima and maxima of the power readings (optional sensors)
+        self.rolling = RedbackRollingStats()
+        # after a failed update the last good data is served (stale) until the grace period ends
+        self.stale_grace = timedelta(seconds=entry.options.get(CONF_STALE_GRACE, STALE_GRACE))
+        self.last_success: datetime | None = None
+        self.stale = False
+        self._dispatched_stale = False
+
+        # on-demand refreshes (redback.refresh service) are single-flight and rate-limited
+        self._refresh_flight = RedbackSingleFlight()
+        self._last_forced_refresh: float | None = None
+
+        # seconds taken by the API requests of the last update cycle, and a moving average
+        self.cycle_latency: float | None = None
+        self.cycle_latency_avg: float | None = None
+
+        # polls are timed to just after each new cloud record is due, and back off while the site is idle
+        self.scheduler = RedbackPollScheduler(
+            SCAN_INTERVAL,
+            POLL_RETRY_INTERVAL,
+            POLL_MAX_RETRIES,
+            POLL_MARGIN,
+            timedelta(seconds=entry.options.get(CONF_POLL_MIN_INTERVAL, POLL_MIN_INTERVAL)),
+            timedelta(seconds=entry.options.get(CONF_POLL_MAX_INTERVAL, POLL_MAX_INTERVAL)),
+        )
+        self.new_snapshot = False
+        self.prewarmer = RedbackPrewarmer(hass)
+
+        # entities are only told about the data keys they use, at the rate of their refresh
+        # tier (see async_update_listeners)
+        self.tier_intervals = {
+            TIER_FAST: 0,
+            TIER_SLOW: entry.options.get(CONF_SLOW_INTERVAL, SLOW_INTERVAL),
+        }
+        self._dispatched: dict[str, tuple] = {}
+        self._tier_updated: dict[str, float] = {}
+        self._listener_index: dict[str, tuple[dict[str, list[CALLBACK_TYPE]], list[CALLBACK_TYPE]]] | None = None
+
+        # always_update=False: entities are not updated when the snapshot is unchanged
+        super().__init__(
+            hass, LOGGER, config_entry=entry, name=DOMAIN, update_interval=SCAN_INTERVAL, always_update=False
+        )
 
     async def _async_update_data(self):
         """Fetch system status from Redback."""
@@ -40,17 +205,424 @@ class RedbackDataUpdateCoordinator(DataUpdateCoordinator):
             "Syncing data with Redback (entry_id=%s)", self.config_entry.entry_id
         )
 
+        # rolling windows only keep recent readings, even when no new ones arrive
+        self.rolling.expire(dt_util.utcnow().timestamp())
+
+        start = time.monotonic()
         try:
-            # the Redback integration has built-in timers to rate-limit the data updates and not hammer the API
-            self.inverter_info = await self.redback.getInverterInfo()
-            self.energy_data = await self.redback.getEnergyData()
+            # inverter info is rate-limited by the library, energy data by the poll scheduler;
+            # both are fetched at once, within a single timeout for the whole cycle
+            async with asyncio.timeout(UPDATE_TIMEOUT):
+                self.inverter_info, energy_data = await gatherRequests(
+                    self.redback.getInverterInfo(),
+                    self.redback.getEnergyData(),
+                )
+        except TimeoutError as err:
+            self._async_schedule_poll(None)
+            return self._async_serve_stale(f"Timed out after {UPDATE_TIMEOUT}s", err)
         except RedbackError as err:
-            raise UpdateFailed(f"HTTP error: {err}") from err
+            self._async_schedule_poll(None)
+            return self._async_serve_stale(f"HTTP error: {err}", err)
         except RedbackConnectionError as err:
-            raise UpdateFailed(f"Connection error: {err}") from err
+            self._async_schedule_poll(None)
+            return self._async_serve_stale(f"Connection error: {err}", err)
         except RedbackAPIError as err:
+            self._async_schedule_poll(None)
             LOGGER.debug(f"API error: {err}")
             raise ConfigEntryAuthFailed("Invalid credentials") from err
 
+        self._async_record_latency(time.monotonic() - start)
+        self.last_success = dt_util.utcnow()
+        self._async_set_stale(False)
+        self.new_snapshot = self._async_schedule_poll(energy_data)
+        if not self.new_snapshot and self.data is not None:
+            # same cloud record as last time, keep the previous data so entities are not updated
+            return self.data
+
+        self.energy_data = energy_data
+        self._async_save_metadata()
+        self._async_check_gap()
+        self._async_write_statistics()
+        self._async_add_rolling()
+
         return self.energy_data
 
+    def _async_serve_stale(self, message: str, err: Exception):
+        """Keep serving the last good data during the grace period, then fail the update."""
+        if (
+            self.data is None
+            or self.last_success is None
+            or dt_util.utcnow() - self.last_success >= self.stale_grace
+        ):
+            # entities become unavailable, the coordinator updates them all for that
+            self.stale = False
+            raise UpdateFailed(message) from err
+
+        if not self.stale:
+            LOGGER.warning(
+                "%s; serving the last good Redback data (from %s) for up to %s",
+                message, self.last_success, self.stale_grace,
+            )
+        self.new_snapshot = False
+        self._async_set_stale(True)
+        return self.data
+
+    @callback
+    def _async_set_stale(self, stale: bool) -> None:
+        """Mark the data stale (or fresh again), updating every entity when that changes."""
+        if stale == self.stale:
+            return
+        self.stale = stale
+        # the data itself has not changed, so the coordinator would not update the entities
+        if self.data is not None and self.last_update_success:
+            self.async_update_listeners()
+
+    async def async_force_refresh(self) -> None:
+        """Refresh now (redback.refresh service); concurrent calls share one refresh."""
+        await self._refresh_flight.run("refresh", self._async_force_refresh)
+
+    async def _async_force_refresh(self) -> None:
+        now = time.monotonic()
+        if self._last_forced_refresh is not None and now - self._last_forced_refresh < REFRESH_MIN_INTERVAL:
+            LOGGER.debug("Redback refresh requested too soon, skipped (entry_id=%s)", self.config_entry.entry_id)
+            return
+        self._last_forced_refresh = now
+        # the site's own poll schedule (or its account's) carries on as before
+        await self.async_refresh()
+
+    async def async_load_metadata(self) -> bool:
+        """Restore the site ID, inverter info, API capabilities and entity layout saved by a previous run; returns True if found."""
+        if not (stored := await self._store.async_load()):
+            return False
+        self._stored = stored
+        if stored.get("site_id"):
+            self.redback.siteId = stored["site_id"]
+        self.inverter_info = stored["inverter_info"]
+        self.layout = stored["layout"]
+        # the dynamic data API version need not be negotiated again
+        self.redback.restoreCapabilities(stored.get("capabilities"))
+        LOGGER.debug("Restored Redback metadata for %s", self.config_entry.entry_id)
+        return True
+
+    @callback
+    def _async_save_metadata(self) -> None:
+        """Store the site ID, inverter info, API capabilities and entity layout when they change."""
+        capabilities = self.redback.capabilities
+        layout = {
+            "pv_count": min(capabilities["pvs"] if capabilities else len(self.energy_data.pvs), MAX_PVS),
+            "has_battery": self.inverter_info.get("BatteryCount", 0) > 0,
+            # grid phase IDs (public API only), for the per-phase analytics sensors
+            "phases": [phase.id for phase in self.energy_data.phases],
+        }
+        if self.layout is None:
+            self.layout = layout
+        elif layout == self.layout:
+            self._pending_layout = None
+        else:
+            # a single odd record (e.g. with null PVs or Phases) must not rebuild the entities,
+            # only a new layout seen in several records in a row
+            if layout != self._pending_layout:
+                self._pending_layout = layout
+                self._pending_layout_count = 0
+            self._pending_layout_count += 1
+            if self._pending_layout_count >= LAYOUT_CONFIRM_RECORDS:
+                # entities are built from the layout, so rebuild them
+                LOGGER.info("Redback site layout changed to %s, reloading", layout)
+                self.layout = layout
+                self._pending_layout = None
+                self.hass.config_entries.async_schedule_reload(self.config_entry.entry_id)
+
+        metadata = {
+            "site_id": self.redback.siteId,
+            "inverter_info": self.inverter_info,
+            "capabilities": capabilities,
+            "layout": self.layout,
+        }
+        if metadata != self._stored:
+            self._stored = metadata
+            self._store.async_delay_save(lambda: metadata, STORAGE_SAVE_DELAY)
+
+    def _async_record_latency(self, latency: float) -> None:
+        """Track how long the API requests of an update cycle took."""
+        self.cycle_latency = latency
+        if self.cycle_latency_avg is None:
+            self.cycle_latency_avg = latency
+        else:
+            self.cycle_latency_avg += (latency - self.cycle_latency_avg) / 10
+        LOGGER.debug("Redback update cycle took %.3fs", latency)
+
+    def _async_schedule_poll(self, energy_data) -> bool:
+        """Schedule the next poll from a fetch result (None = failed); returns True for a new record."""
+        now = dt_util.utcnow()
+        if energy_data is None:
+            self.scheduler.failed(now)
+            new_snapshot = False
+        else:
+            active = site_is_active(
+                self.energy_data, energy_data, ACTIVITY_PV_THRESHOLD, ACTIVITY_CHANGE_THRESHOLD
+            )
+            new_snapshot = self.scheduler.record(parseTimestamp(energy_data.get("TimestampUtc")), now, active)
+
+        # sites polled by an account coordinator have no timer of their own
+        if self.update_interval is not None:
+            self.update_interval = self.scheduler.interval(now)
+            self.prewarmer.schedule(self.redback, self.update_interval)
+        return new_snapshot
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE, context=None) -> CALLBACK_TYPE:
+        """Listen for data updates.
+
+        context is (refresh tier, data keys the listener uses); keys of None means every update.
+        """
+        remove_listener = super().async_add_listener(update_callback, context)
+        self._listener_index = None
+
+        @callback
+        def remove() -> None:
+            remove_listener()
+            self._listener_index = None
+
+        return remove
+
+    def _async_get_listener_index(self) -> dict[str, tuple[dict[str, list[CALLBACK_TYPE]], list[CALLBACK_TYPE]]]:
+        """Return each tier's listeners indexed by data key, and those which want every update."""
+        if self._listener_index is None:
+            index: dict[str, tuple[dict[str, list[CALLBACK_TYPE]], list[CALLBACK_TYPE]]] = {}
+            for update_callback, context in self._listeners.values():
+                tier, keys = context or (TIER_FAST, None)
+                tier_index, always = index.setdefault(tier, ({}, []))
+                if keys is None:
+                    always.append(update_callback)
+                else:
+                    for key in keys:
+                        tier_index.setdefault(key, []).append(update_callback)
+            self._listener_index = index
+        return self._listener_index
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update only the entities whose data keys changed, for each tier which is due."""
+        current = (self.data, getattr(self, "inverter_info", None)) if self.last_update_success else None
+        now = time.monotonic()
+        # after startup, a failure or a change of staleness every entity needs updating
+        # (e.g. availability, stale attribute)
+        stale_changed, self._dispatched_stale = self.stale != self._dispatched_stale, self.stale
+        if current is None or not self._dispatched or stale_changed:
+            self._dispatched = {tier: current for tier in self.tier_intervals} if current else {}
+            self._tier_updated = dict.fromkeys(self.tier_intervals, now)
+            super().async_update_listeners()
+            return
+
+        # one batch per cycle, each entity at most once
+        update_callbacks: dict[CALLBACK_TYPE, None] = {}
+        changed: set[str] = set()
+        for tier, (index, always) in self._async_get_listener_index().items():
+            # allow a second of jitter in the poll times
+            if now - self._tier_updated.get(tier, 0) + 1 < self.tier_intervals.get(tier, 0):
+                continue
+            # compare with what this tier last saw, so slow tiers do not miss a change
+            previous = self._dispatched.get(tier) or (None, None)
+            self._dispatched[tier] = current
+            self._tier_updated[tier] = now
+            tier_changed = changedKeys(previous[0], current[0]) | changedKeys(previous[1], current[1])
+            changed |= tier_changed
+            update_callbacks.update(dict.fromkeys(always))
+            for key in tier_changed:
+                update_callbacks.update(dict.fromkeys(index.get(key, ())))
+        LOGGER.debug(
+            "%s data key(s) changed, updating %s of %s entities",
+            len(changed), len(update_callbacks), len(self._listeners),
+        )
+        for update_callback in update_callbacks:
+            update_callback()
+
+    async def async_shutdown(self) -> None:
+        """Cancel scheduled work, and save the energy accumulators, on unload."""
+        self.prewarmer.cancel()
+        await self.energy_store.async_save()
+        await super().async_shutdown()
+
+    def _async_write_statistics(self) -> None:
+        """Write long-term statistics from the cloud's all-time counters (public API only)."""
+        if self.redback.isPrivateAPI() or self.redback.siteId is None:
+            return
+        if self._statistics is None:
+            self._statistics = RedbackStatisticsWriter(
+                self.hass, self.redback.siteId, self.config_entry.data["displayname"]
+            )
+        self._statistics.async_add(self.energy_data)
+
+    def _async_add_rolling(self) -> None:
+        """Add the new snapshot to the rolling windows, at the time of its reading."""
+        timestamp = parseTimestamp(self.energy_data.get("TimestampUtc")) or self.last_success
+        self.rolling.add(timestamp.timestamp(), self.energy_data)
+
+    def _async_check_gap(self) -> None:
+        """Start a background backfill when the data has a gap (after a restart or cloud outage)."""
+        if self.redback.isPrivateAPI() or self._backfill_task is not None:
+            return
+        if (timestamp := parseTimestamp(self.energy_data.get("TimestampUtc"))) is None:
+            return
+
+        previous, self._last_timestamp = self._last_timestamp, timestamp
+        # records skipped by the adaptive scheduler while the site is idle are not a gap
+        if previous is not None and timestamp - previous < BACKFILL_GAP + self.scheduler.max_interval:
+            return
+
+        self._backfill_task = self.config_entry.async_create_background_task(
+            self.hass, self._async_backfill(previous), f"{DOMAIN} backfill {self.redback.siteId}"
+        )
+
+    async def _async_backfill(self, previous: datetime | None) -> None:
+        """Import the missing interval into long-term statistics."""
+        site_id = self.redback.siteId
+        try:
+            # resume from the last imported hour, or failing that from the last record seen
+            start = await async_get_last_statistic_time(self.hass, site_id) or previous
+            # only whole hours are imported, the current hour is still in progress
+            end = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+            if start is None:
+                return
+            # step from the start of the hour, so each hour (that of the last record seen
+            # included) gets its end-of-hour counters
+            start = start.replace(minute=0, second=0, microsecond=0)
+            if start >= end:
+                return
+            start = max(start, end - BACKFILL_MAX)
+
+            count = await async_backfill_statistics(
+                self.hass,
+                self.redback,
+                site_id,
+                self.config_entry.data["displayname"],
+                start,
+                end,
+                BACKFILL_BATCH,
+                BACKFILL_CONCURRENCY,
+            )
+            LOGGER.debug("Backfilled %s Redback record(s) for %s", count, site_id)
+        except (RedbackError, RedbackConnectionError, RedbackAPIError) as err:
+            LOGGER.warning("Unable to backfill Redback data for %s: %s", site_id, err)
+        finally:
+            self._backfill_task = None
+
+
+class RedbackAccountCoordinator(DataUpdateCoordinator):
+    """Polls every site of one Redback account (client_id) in a single batched cycle.
+
+    Each site keeps its own RedbackDataUpdateCoordinator for its entities, but
+    the account coordinator owns the poll timer and pushes each site's data out.
+    """
+
+    def __init__(self, hass: HomeAssistant, client_id: str) -> None:
+        """Initialize the Redback account coordinator."""
+        self.client_id = client_id
+        self.sites: dict[str, RedbackDataUpdateCoordinator] = {}
+        self._site_ids: list[str] | None = None
+        self._discovery_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(ACCOUNT_CONCURRENCY)
+        self._unsub: dict[str, CALLBACK_TYPE] = {}
+        self.prewarmer = RedbackPrewarmer(hass)
+
+        # shared by several config entries, so not tied to whichever one set up first (that
+        # entry's unload or polling preference must not stop the other sites); it is shut
+        # down when the last site detaches
+        super().__init__(
+            hass, LOGGER, config_entry=None, name=f"{DOMAIN}_account", update_interval=SCAN_INTERVAL
+        )
+
+    async def async_discover_sites(self, redback: RedbackInverter) -> list[str]:
+        """Download the account's site list once, shared by every site."""
+        async with self._discovery_lock:
+            if self._site_ids is None:
+                try:
+                    self._site_ids = await redback.getSiteIds()
+                except (RedbackError, RedbackConnectionError) as err:
+                    raise UpdateFailed(f"Site discovery failed: {err}") from err
+                except RedbackAPIError as err:
+                    raise ConfigEntryAuthFailed("Invalid credentials") from err
+                LOGGER.debug("Discovered %s Redback site(s) for account", len(self._site_ids))
+        return self._site_ids
+
+    async def async_add_site(self, site: RedbackDataUpdateCoordinator) -> None:
+        """Attach a site coordinator, handing its polling over to the account."""
+        # a site ID restored from storage saves downloading the site list
+        if site.redback.siteId is None:
+            site_ids = await self.async_discover_sites(site.redback)
+            site.redback.siteId = site.redback.selectSiteId(site_ids)
+        site.update_interval = None
+
+        entry_id = site.config_entry.entry_id
+        self.sites[entry_id] = site
+        # a listener is needed for the account coordinator to keep its timer running
+        self._unsub[entry_id] = self.async_add_listener(lambda: None)
+
+    def async_remove_site(self, entry_id: str) -> None:
+        """Detach a site coordinator (on unload)."""
+        self.sites.pop(entry_id, None)
+        if unsub := self._unsub.pop(entry_id, None):
+            unsub()
+
+    async def _async_update_data(self):
+        """Fetch data for every site of the account which is due, with bounded concurrency."""
+        now = dt_util.utcnow()
+        due = [site for site in list(self.sites.values()) if site.scheduler.is_due(now)]
+        LOGGER.debug("Syncing %s of %s Redback site(s) for account", len(due), len(self.sites))
+
+        await asyncio.gather(*(self._async_update_site(site) for site in due))
+
+        # wake up again when the next site is due
+        now = dt_util.utcnow()
+        self.update_interval = min(
+            (site.scheduler.interval(now) for site in self.sites.values()),
+            default=SCAN_INTERVAL,
+        )
+        # every site of the account shares the same session and host
+        if self.sites:
+            self.prewarmer.schedule(next(iter(self.sites.values())).redback, self.update_interval)
+
+    async def _async_update_site(self, site: RedbackDataUpdateCoordinator) -> None:
+        """Fetch one site's data and push it out to that site's coordinator."""
+        async with self._semaphore:
+            try:
+                data = await site._async_update_data()
+            except ConfigEntryAuthFailed as err:
+                site.async_set_update_error(err)
+                site.config_entry.async_start_reauth(self.hass)
+            except UpdateFailed as err:
+                site.async_set_update_error(err)
+            except Exception as err:  # pylint: disable=broad-except
+                # as DataUpdateCoordinator does for a site with its own timer: the site fails
+                # (rather than the whole account), and is polled again after the default interval
+                LOGGER.exception("Unexpected error fetching Redback data for %s", site.config_entry.entry_id)
+                site.scheduler.failed(dt_util.utcnow())
+                site.async_set_update_error(UpdateFailed(f"Unexpected error: {err}"))
+            else:
+                # unchanged snapshots are not pushed out to the entities
+                if site.new_snapshot or not site.last_update_success:
+                    site.async_set_updated_data(data)
+
+
+def async_get_account_coordinator(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> RedbackAccountCoordinator:
+    """Return the account coordinator for a config entry's credentials, creating it if needed."""
+    accounts = hass.data[DOMAIN].setdefault(DATA_ACCOUNTS, {})
+    client_id = entry.data["client_id"]
+    if client_id not in accounts:
+        accounts[client_id] = RedbackAccountCoordinator(hass, client_id)
+    return accounts[client_id]
+
+
+async def async_release_account_coordinator(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Detach a config entry from its account coordinator, shutting the account down when empty."""
+    accounts = hass.data[DOMAIN].get(DATA_ACCOUNTS, {})
+    client_id = entry.data["client_id"]
+    if (account := accounts.get(client_id)) is None:
+        return
+    account.async_remove_site(entry.entry_id)
+    if not account.sites:
+        accounts.pop(client_id)
+        account.prewarmer.cancel()
+        await account.async_shutdown()
@@ -38,7 +38,17 @@ async def async_get_device_diagnostics(
         "name": coordinator.name,
         "always_update": coordinator.always_update,
         "last_update_success": coordinator.last_update_success,
+        "last_success": coordinator.last_success,
+        "stale": coordinator.stale,
         "update_interval": updateInterval,
+        "poll_interval": coordinator.scheduler.current_interval.total_seconds(),
+        "poll_stride": coordinator.scheduler.stride,
+        "site_active": coordinator.scheduler.active,
         "inverter_info": coordinator.inverter_info,
+        "cache_stats": coordinator.redback.cacheStats(),
+        "transfer_stats": coordinator.redback.transferStats(),
+        "capabilities": coordinator.redback.capabilities,
+        "cycle_latency": coordinator.cycle_latency,
+        "cycle_latency_avg": coordinator.cycle_latency_avg,
         "device_entry": device.dict_repr,
     }
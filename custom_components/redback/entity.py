@@ -1,37 +1,45 @@
 """Redback entity base class for the Redback integration."""
 from __future__ import annotations
 
-from homeassistant.helpers.entity import DeviceInfo
+from dataclasses import dataclass
+from typing import Any
+
+from homeassistant.helpers.entity import DeviceInfo, EntityDescription
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
+from .const import DOMAIN, TIER_FAST
 from .coordinator import RedbackDataUpdateCoordinator
 
 
+@dataclass(frozen=True, kw_only=True)
+class RedbackEntityDescription(EntityDescription):
+    """Describes a Redback entity"""
+
+    # data keys the entity reads, it is only updated when they change (None = every update,
+    # for entities which accumulate over time)
+    data_keys: frozenset[str] | None = None
+    # refresh tier (options flow), slow tier entities are updated less often
+    tier: str = TIER_FAST
+
+
 class RedbackEntity(CoordinatorEntity[RedbackDataUpdateCoordinator]):
     """Base class for Redback entities"""
 
     coordinator: RedbackDataUpdateCoordinator
+    entity_description: RedbackEntityDescription
     _attr_has_entity_name = True
 
-    def __init__(self, coordinator: RedbackDataUpdateCoordinator, details) -> None:
+    def __init__(self, coordinator: RedbackDataUpdateCoordinator, description: RedbackEntityDescription) -> None:
         # initialise the entity
         site_id = coordinator.config_entry.data["site_id"]
         self.coordinator = coordinator
         assert self.coordinator is not None
-        super().__init__(coordinator)
+        # the coordinator only updates this entity when its data keys change, at its tier's rate
+        super().__init__(coordinator, context=(description.tier, description.data_keys))
+        self.entity_description = description
 
-        # store the base for the unique_id, to be used by each entity
-        self.base_unique_id = site_id
-
-        # some entities need these extra details
-        if details:
-            self._attr_name = details["name"]
-            self.id_suffix = details["id_suffix"]
-            self.data_source = details["data_source"]
-            self.direction = details.get("direction")
-            self.convertPercent = details.get("convertPercent")
-            self.convertkW = details.get("convertkW")
+        # built once here, not on every access
+        self._attr_unique_id = f"{site_id}_{description.key}"
 
         # link to the base Redback device
         self._attr_device_info = DeviceInfo(
@@ -42,3 +50,15 @@ class RedbackEntity(CoordinatorEntity[RedbackDataUpdateCoordinator]):
             sw_version=coordinator.inverter_info["FirmwareVersion"],
             configuration_url="https://portal.redbacktech.com/",
         )
+
+    @property
+    def available(self) -> bool:
+        """Entities set up from stored metadata are unavailable until the first data arrives."""
+        return super().available and self.coordinator.energy_data is not None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Flag values served from the last good data after a failed update."""
+        if not self.coordinator.stale:
+            return None
+        return {"stale": True, "last_data": self.coordinator.last_success}
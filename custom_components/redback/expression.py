@@ -0,0 +1,197 @@
+"""Expression engine for calculated ($calc$) Redback sensors.
+
+A calculated sensor is defined by a small Python-like expression over the
+energy data, e.g. "float(ed['PvPowerInstantaneouskW']) - float(ed['ActiveExportedPowerInstantaneouskW'])".
+Each definition is parsed once into a tree of closures, only a whitelisted
+subset of Python is accepted, and nothing is ever passed to eval().
+
+Field access (ed['Key']) is null-safe: a missing or null key reads as None,
+which is falsy (so "ed['Key'] if ed['Key'] else 0" works) and which float()
+converts to 0.0. Arithmetic and ordering comparisons with None give None, and
+an expression which cannot be evaluated for a record (e.g. division by zero)
+gives None, so the sensor reads as unknown rather than failing the update.
+"""
+from __future__ import annotations
+
+import ast
+from collections.abc import Callable, Mapping
+from functools import lru_cache
+import operator
+from typing import Any
+
+CALC_PREFIX = "$calc$"
+
+
+class RedbackExpressionError(ValueError):
+    """Invalid calculated sensor expression"""
+
+
+def _null_safe_float(value: Any = 0) -> float:
+    return 0.0 if value is None else float(value)
+
+
+_FUNCTIONS: dict[str, Callable[..., Any]] = {
+    "float": _null_safe_float,
+    "abs": abs,
+    "min": min,
+    "max": max,
+    "round": round,
+}
+
+_BIN_OPS: dict[type[ast.operator], Callable[[Any, Any], Any]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+
+_UNARY_OPS: dict[type[ast.unaryop], Callable[[Any], Any]] = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+    ast.Not: operator.not_,
+}
+
+_COMPARE_OPS: dict[type[ast.cmpop], Callable[[Any, Any], Any]] = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+
+Evaluator = Callable[[Mapping[str, Any]], Any]
+
+
+class CompiledExpression:
+    """A parsed calculated sensor expression, ready to evaluate against energy data."""
+
+    __slots__ = ("source", "keys", "_evaluate")
+
+    def __init__(self, source: str, keys: frozenset[str], evaluate: Evaluator) -> None:
+        self.source = source
+        self.keys = keys
+        self._evaluate = evaluate
+
+    def __call__(self, ed: Mapping[str, Any]) -> Any:
+        """Evaluate the expression against energy data, None if it cannot be evaluated."""
+        try:
+            return self._evaluate(ed)
+        except (ZeroDivisionError, TypeError, ValueError, OverflowError):
+            return None
+
+    def unknown_keys(self, ed: Mapping[str, Any]) -> set[str]:
+        """Return the keys referred to by the expression which are absent from energy data."""
+        return {key for key in self.keys if key not in ed}
+
+
+def is_calc(data_source: str) -> bool:
+    """Return True if a sensor data source is a calculated expression."""
+    return data_source.startswith(CALC_PREFIX)
+
+
+@lru_cache(maxsize=None)
+def compile_calc(data_source: str) -> CompiledExpression:
+    """Parse a "$calc$ ..." data source once (shared by every entity using it)."""
+    source = data_source.removeprefix(CALC_PREFIX).strip()
+    try:
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError as err:
+        raise RedbackExpressionError(f"Invalid expression {source!r}: {err.msg}") from err
+
+    keys: set[str] = set()
+    evaluate = _compile(tree.body, keys, source)
+    return CompiledExpression(source, frozenset(keys), evaluate)
+
+
+def _compile(node: ast.AST, keys: set[str], source: str) -> Evaluator:
+    """Turn one whitelisted AST node into a closure."""
+
+    # numeric constant
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        value = node.value
+        return lambda ed: value
+
+    # energy data field: ed['Key']
+    if (
+        isinstance(node, ast.Subscript)
+        and isinstance(node.value, ast.Name)
+        and node.value.id == "ed"
+        and isinstance(node.slice, ast.Constant)
+        and isinstance(node.slice.value, str)
+    ):
+        key = node.slice.value
+        keys.add(key)
+        return lambda ed: ed.get(key)
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+        bin_op = _BIN_OPS[type(node.op)]
+        left = _compile(node.left, keys, source)
+        right = _compile(node.right, keys, source)
+
+        def binary(ed: Mapping[str, Any]) -> Any:
+            a = left(ed)
+            b = right(ed)
+            return None if a is None or b is None else bin_op(a, b)
+
+        return binary
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        unary_op = _UNARY_OPS[type(node.op)]
+        operand = _compile(node.operand, keys, source)
+        if unary_op is operator.not_:
+            return lambda ed: not operand(ed)
+
+        def unary(ed: Mapping[str, Any]) -> Any:
+            value = operand(ed)
+            return None if value is None else unary_op(value)
+
+        return unary
+
+    if isinstance(node, ast.IfExp):
+        test = _compile(node.test, keys, source)
+        body = _compile(node.body, keys, source)
+        orelse = _compile(node.orelse, keys, source)
+        return lambda ed: body(ed) if test(ed) else orelse(ed)
+
+    if isinstance(node, ast.BoolOp):
+        values = [_compile(value, keys, source) for value in node.values]
+        is_and = isinstance(node.op, ast.And)
+
+        # same short-circuit semantics as Python, e.g. "ed['Key'] or 0"
+        def bool_op(ed: Mapping[str, Any]) -> Any:
+            for value in values:
+                result = value(ed)
+                if bool(result) != is_and:
+                    return result
+            return result
+
+        return bool_op
+
+    if isinstance(node, ast.Compare) and len(node.ops) == 1 and type(node.ops[0]) in _COMPARE_OPS:
+        compare_op = _COMPARE_OPS[type(node.ops[0])]
+        left = _compile(node.left, keys, source)
+        right = _compile(node.comparators[0], keys, source)
+        if compare_op in (operator.eq, operator.ne):
+            return lambda ed: compare_op(left(ed), right(ed))
+
+        def compare(ed: Mapping[str, Any]) -> Any:
+            a = left(ed)
+            b = right(ed)
+            return None if a is None or b is None else compare_op(a, b)
+
+        return compare
+
+    if (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id in _FUNCTIONS
+        and not node.keywords
+    ):
+        function = _FUNCTIONS[node.func.id]
+        args = [_compile(arg, keys, source) for arg in node.args]
+        return lambda ed: function(*(arg(ed) for arg in args))
+
+    raise RedbackExpressionError(
+        f"Unsupported syntax in expression {source!r}: {type(node).__name__}"
+    )
@@ -0,0 +1,133 @@
+"""Energy integration for the Redback integration.
+
+Where the cloud has no all-time energy counter (the private API), or where a
+sensor has always been integrated locally (the public API's battery charge and
+discharge totals), energy is integrated from power readings: trapezoidal integration over the samples' own
+timestamps, ignoring duplicate and out-of-order samples and capping gaps.
+The accumulators are kept in an HA Store, so they survive restarts; writes are
+debounced, so many samples are saved together, and flushed on unload. There is
+one Store per config entry, shared across reloads, so a setup never loads the
+file before the previous setup's last save has landed.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, DATA_ENERGY_STORES, ENERGY_MAX_GAP, ENERGY_SAVE_DELAY, STORAGE_VERSION
+
+
+class RedbackIntegrator:
+    """Trapezoidal integration of a power reading over sample timestamps."""
+
+    __slots__ = ("total", "last_time", "last_value", "last_reset", "max_gap")
+
+    def __init__(
+        self,
+        max_gap: timedelta,
+        total: float = 0.0,
+        last_time: datetime | None = None,
+        last_value: float | None = None,
+        last_reset: datetime | None = None,
+    ) -> None:
+        """Initialize the integrator."""
+        self.max_gap = max_gap
+        self.total = total
+        self.last_time = last_time
+        self.last_value = last_value
+        self.last_reset = last_reset or dt_util.utcnow()
+
+    def add(self, timestamp: datetime, value: float) -> bool:
+        """Add a sample (power in kW at timestamp), returns False if it was ignored."""
+        if self.last_time is not None and timestamp <= self.last_time:
+            # duplicate (same snapshot again) or out of order
+            return False
+        if self.last_time is not None:
+            # a gap longer than max_gap only counts for max_gap, nothing is known about the rest
+            interval = min(timestamp - self.last_time, self.max_gap)
+            self.total += (self.last_value + value) / 2 * interval.total_seconds() / 3600
+        self.last_time = timestamp
+        self.last_value = value
+        return True
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state, for storage."""
+        return {
+            "total": self.total,
+            "last_time": self.last_time.isoformat() if self.last_time else None,
+            "last_value": self.last_value,
+            "last_reset": self.last_reset.isoformat(),
+        }
+
+    @classmethod
+    def from_dict(cls, max_gap: timedelta, data: dict[str, Any]) -> RedbackIntegrator:
+        """Restore from storage."""
+        return cls(
+            max_gap,
+            data.get("total", 0.0),
+            dt_util.parse_datetime(data["last_time"]) if data.get("last_time") else None,
+            data.get("last_value"),
+            dt_util.parse_datetime(data["last_reset"]) if data.get("last_reset") else None,
+        )
+
+
+class RedbackEnergyStore:
+    """The persisted energy integrators of one config entry."""
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        """Initialize the energy store."""
+        self._store: Store[dict] = async_get_energy_store(hass, entry)
+        self._integrators: dict[str, RedbackIntegrator] = {}
+        self._stored: dict[str, dict] = {}
+        self._loaded = False
+
+    async def async_load(self) -> None:
+        """Load the saved accumulators."""
+        self._stored = await self._store.async_load() or {}
+        self._loaded = True
+
+    async def async_save(self) -> None:
+        """Save the accumulators now (on unload), rather than after the save delay."""
+        # never overwrite the saved accumulators with those of a setup which did not load them
+        if self._loaded:
+            await self._store.async_save(self._data_to_save())
+
+    def integrator(self, key: str) -> RedbackIntegrator:
+        """Return the integrator for an entity (e.g. its unique ID suffix), restored if saved."""
+        if (integrator := self._integrators.get(key)) is None:
+            if (data := self._stored.get(key)) is not None:
+                integrator = RedbackIntegrator.from_dict(ENERGY_MAX_GAP, data)
+            else:
+                integrator = RedbackIntegrator(ENERGY_MAX_GAP)
+            self._integrators[key] = integrator
+        return integrator
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Save the accumulators soon; samples arriving meanwhile are saved together."""
+        self._store.async_delay_save(self._data_to_save, ENERGY_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, dict]:
+        return self._stored | {
+            key: integrator.as_dict() for key, integrator in self._integrators.items()
+        }
+
+
+def async_get_energy_store(hass: HomeAssistant, entry: ConfigEntry) -> Store[dict]:
+    """Return the store holding a config entry's energy accumulators, one per entry."""
+    stores = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_ENERGY_STORES, {})
+    if (store := stores.get(entry.entry_id)) is None:
+        store = stores[entry.entry_id] = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.energy")
+    return store
+
+
+async def async_remove_energy_store(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete a removed config entry's energy accumulators."""
+    await async_get_energy_store(hass, entry).async_remove()
+    hass.data[DOMAIN][DATA_ENERGY_STORES].pop(entry.entry_id)
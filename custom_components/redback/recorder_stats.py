@@ -0,0 +1,176 @@
+"""Long-term statistics for the Redback integration.
+
+The cloud's all-time energy counters are written to the recorder as external
+statistics (one row per hour, sum = counter value). Live data is written as
+each hour completes, and gaps caused by restarts or cloud outages are filled
+in from historical data.
+"""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+)
+from homeassistant.const import UnitOfEnergy
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, LOGGER
+from .redbacklib import parseTimestamp
+
+# all-time counter in the dynamic data: (statistic suffix, name)
+COUNTER_STATISTICS = {
+    "PvAllTimeEnergykWh": ("pv_total", "Solar Generation Total"),
+    "LoadAllTimeEnergykWh": ("load_total", "Site Load Total"),
+    "ExportAllTimeEnergykWh": ("export_total", "Grid Export Total"),
+    "ImportAllTimeEnergykWh": ("import_total", "Grid Import Total"),
+    "BatteryChargeAllTimeEnergykWh": ("battery_charge_total", "Battery Charge Total"),
+    "BatteryDischargeAllTimeEnergykWh": ("battery_discharge_total", "Battery Discharge Total"),
+}
+
+
+def statistic_id(site_id: str, counter: str) -> str:
+    """Return the external statistic ID for one of a site's all-time counters."""
+    return f"{DOMAIN}:{site_id.lower()}_{COUNTER_STATISTICS[counter][0]}"
+
+
+def hourly_statistics(
+    records: list[dict[str, Any]], last: dict[str, float] | None = None
+) -> dict[str, list[StatisticData]]:
+    """Reduce dynamic data records to hourly statistics for each all-time counter.
+
+    The last counter value seen within an hour becomes that hour's state and sum.
+    Null, zero and decreasing counter values are skipped, as the sum would drop and
+    then jump back by the whole counter. last holds each counter's last value, and is
+    updated, so that it carries across batches.
+    """
+    if last is None:
+        last = {}
+    hours: dict[str, dict[datetime, float]] = {}
+    for record in records:
+        if (timestamp := parseTimestamp(record.get("TimestampUtc"))) is None:
+            continue
+        hour = timestamp.replace(minute=0, second=0, microsecond=0)
+        for counter in COUNTER_STATISTICS:
+            if (value := record.get(counter)) is None:
+                continue
+            if (value := float(value)) <= 0 or value < last.get(counter, 0):
+                continue
+            last[counter] = value
+            # records arrive oldest first, so later values overwrite earlier ones
+            hours.setdefault(counter, {})[hour] = value
+
+    return {
+        counter: [
+            StatisticData(start=hour, state=value, sum=value)
+            for hour, value in sorted(values.items())
+        ]
+        for counter, values in hours.items()
+    }
+
+
+def async_import_statistics(
+    hass: HomeAssistant,
+    site_id: str,
+    name: str,
+    records: list[dict[str, Any]],
+    last: dict[str, float] | None = None,
+) -> None:
+    """Queue a batch of dynamic data records for import as external statistics."""
+    for counter, statistics in hourly_statistics(records, last).items():
+        metadata = StatisticMetaData(
+            has_mean=False,
+            has_sum=True,
+            name=f"{name} {COUNTER_STATISTICS[counter][1]}",
+            source=DOMAIN,
+            statistic_id=statistic_id(site_id, counter),
+            unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        )
+        async_add_external_statistics(hass, metadata, statistics)
+
+
+async def async_get_last_statistic_time(
+    hass: HomeAssistant, site_id: str
+) -> datetime | None:
+    """Return the end of the last imported hour for a site, or None if nothing is imported yet."""
+    counter = next(iter(COUNTER_STATISTICS))
+    last = await get_instance(hass).async_add_executor_job(
+        get_last_statistics, hass, 1, statistic_id(site_id, counter), True, {"sum"}
+    )
+    if not (rows := last.get(statistic_id(site_id, counter))):
+        return None
+    start = rows[0]["start"]
+    # older recorder versions return a datetime, newer ones a timestamp
+    if not isinstance(start, datetime):
+        start = dt_util.utc_from_timestamp(start)
+    return start + timedelta(hours=1)
+
+
+async def async_backfill_statistics(
+    hass: HomeAssistant,
+    redback,
+    site_id: str,
+    name: str,
+    start: datetime,
+    end: datetime,
+    batch_size: int,
+    concurrency: int,
+) -> int:
+    """Stream historical dynamic data for start..end and import it in batches; returns the record count."""
+    LOGGER.debug("Backfilling Redback statistics for %s from %s to %s", site_id, start, end)
+    count = 0
+    batch: list[dict[str, Any]] = []
+    last: dict[str, float] = {}
+    # one record per hour is all the hourly statistics need
+    async for record in redback.streamDynamicHistory(
+        start, end, step=timedelta(hours=1), concurrency=concurrency
+    ):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            async_import_statistics(hass, site_id, name, batch, last)
+            count += len(batch)
+            batch = []
+    if batch:
+        async_import_statistics(hass, site_id, name, batch, last)
+        count += len(batch)
+    return count
+
+
+class RedbackStatisticsWriter:
+    """Writes hourly statistics from a site's live all-time counters.
+
+    Only the last record of each hour is needed, so one record is kept for the
+    hour in progress, and it is written (all counters in one batch) once a
+    record from a later hour arrives.
+    """
+
+    def __init__(self, hass: HomeAssistant, site_id: str, name: str) -> None:
+        """Initialize the writer."""
+        self.hass = hass
+        self.site_id = site_id
+        self.name = name
+        self._hour: datetime | None = None
+        self._record: dict[str, Any] | None = None
+        self._last: dict[str, float] = {}
+
+    @callback
+    def async_add(self, record: Mapping[str, Any]) -> None:
+        """Add a new live dynamic data record."""
+        if (timestamp := parseTimestamp(record.get("TimestampUtc"))) is None:
+            return
+        hour = timestamp.replace(minute=0, second=0, microsecond=0)
+        if self._hour is not None and hour > self._hour:
+            # the previous hour is complete
+            async_import_statistics(self.hass, self.site_id, self.name, [self._record], self._last)
+        elif self._hour is not None and hour < self._hour:
+            return
+        self._hour = hour
+        self._record = {"TimestampUtc": record.get("TimestampUtc")} | {
+            counter: record.get(counter) for counter in COUNTER_STATISTICS
+        }
@@ -2,12 +2,20 @@
 
 import aiohttp
 import asyncio
+import random
+import time
 from math import sqrt
-from datetime import datetime, timedelta
-from urllib.request import Request, urlopen
-from urllib.error import URLError, HTTPError
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
 import json
+import re
 from json.decoder import JSONDecodeError
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from functools import lru_cache
+from types import MappingProxyType
+from urllib.parse import quote
+from yarl import URL
 
 
 class RedbackError(Exception):
@@ -17,7 +25,429 @@ class RedbackConnectionError(Exception):
     """Redback Inverter connection error"""
 
 class RedbackAPIError(Exception):
-    """Redback Inverter API error"""
+    """Redback Inverter API error (status is the HTTP status code, if there was one)"""
+
+    def __init__(self, *args, status=None):
+        super().__init__(*args)
+        self.status = status
+
+class RedbackNotFoundError(RedbackAPIError):
+    """Redback Inverter API error, no data found (404)"""
+
+class RedbackUnauthorizedError(RedbackAPIError):
+    """Redback Inverter API error, credentials or bearer token rejected (401)"""
+
+
+class RedbackRetryPolicy:
+    """Retry policy for API requests: exponential backoff with jitter"""
+
+    def __init__(self, attempts=3, baseDelay=1.0, maxDelay=30.0, jitter=0.5, retryStatuses=(429, 500, 502, 503, 504)):
+        self.attempts = attempts
+        self.baseDelay = baseDelay
+        self.maxDelay = maxDelay
+        self.jitter = jitter # fraction of each delay which is randomised
+        self.retryStatuses = frozenset(retryStatuses)
+
+    def delay(self, attempt, retryAfter=None):
+        """Returns the delay (seconds) before retry number attempt+1, honouring any Retry-After"""
+        if retryAfter is not None:
+            return min(max(retryAfter, 0), self.maxDelay)
+        delay = min(self.baseDelay * 2 ** attempt, self.maxDelay)
+        return delay * (1 - self.jitter * random.random())
+
+RedbackRetryPolicy.default = RedbackRetryPolicy()
+
+
+class RedbackCircuitBreaker:
+    """Per-host circuit breaker: fails fast while the API is down, then probes recovery with a single request"""
+
+    failureThreshold = 5 # consecutive failures before the circuit opens
+    resetTimeout = 60 # seconds before a probe request is allowed through
+    _breakers = {}
+
+    @classmethod
+    def forHost(cls, host):
+        """Returns the shared circuit breaker for a host"""
+        if host not in cls._breakers:
+            cls._breakers[host] = cls(host)
+        return cls._breakers[host]
+
+    def __init__(self, host):
+        self.host = host
+        self.failures = 0
+        self.openUntil = None # time.monotonic() value, None when closed
+        self.probing = False
+
+    @property
+    def isOpen(self):
+        return self.openUntil is not None
+
+    def before(self):
+        """Call before each request, raises RedbackConnectionError while the circuit is open"""
+        if self.openUntil is None:
+            return
+        if self.probing or time.monotonic() < self.openUntil:
+            raise RedbackConnectionError(f"Circuit open for {self.host}, API appears to be down")
+        # half-open: let this one request through as a probe
+        self.probing = True
+
+    def success(self):
+        self.failures = 0
+        self.openUntil = None
+        self.probing = False
+
+    def failure(self):
+        self.failures += 1
+        if self.probing or self.failures >= self.failureThreshold:
+            self.openUntil = time.monotonic() + self.resetTimeout
+            self.probing = False
+
+    def abandon(self):
+        """Call when a request ends without an outcome (e.g. cancelled), so a probe can be retried"""
+        self.probing = False
+
+
+def parseRetryAfter(value):
+    """Returns the seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+    except (TypeError, ValueError):
+        return None
+
+
+API_HOST = "api.redbacktech.com"
+# per-request timeouts: fail fast on connect, allow the API a little longer to respond
+API_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=10, sock_read=20)
+
+
+def createSession(dnsCacheTTL=3600, keepaliveTimeout=300, limitPerHost=8, ssl=True):
+    """Returns an aiohttp session tuned for the Redback API
+
+    The connector caches DNS lookups for a long time (the API's
+    "Cannot connect to host ... [Try again]" errors are DNS failures) and keeps
+    connections alive between polls. The caller owns the session and must close it.
+    """
+    connector = aiohttp.TCPConnector(
+        ttl_dns_cache=dnsCacheTTL,
+        keepalive_timeout=keepaliveTimeout,
+        limit_per_host=limitPerHost,
+        ssl=ssl,
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=API_TIMEOUT)
+
+
+async def apiSend(session, method, url, retryPolicy=None, **kwargs):
+    """Sends an API request, retrying connection errors, timeouts, 5xx and 429 responses
+
+    Requests go through the host's circuit breaker. Returns the final response,
+    which may still be an error response once the retries are exhausted.
+    """
+    policy = retryPolicy or RedbackRetryPolicy.default
+    kwargs.setdefault("timeout", API_TIMEOUT)
+    breaker = RedbackCircuitBreaker.forHost(URL(str(url)).host)
+
+    for attempt in range(policy.attempts):
+        breaker.before()
+        lastAttempt = attempt == policy.attempts - 1
+        retryAfter = None
+        try:
+            response = await session.request(method, url, **kwargs)
+
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            # includes error "Cannot connect to host api.redbacktech.com:443 ssl:default [Try again]"
+            breaker.failure()
+            if lastAttempt:
+                raise RedbackConnectionError(
+                    f"HTTP Connection Error. {e}"
+                ) from e
+        except aiohttp.ClientResponseError as e:
+            breaker.success()
+            raise RedbackError(
+                f"HTTP Response Error. {e.status} {e.message}"
+            ) from e
+        except asyncio.CancelledError:
+            # a cancelled probe says nothing about the API, let the next request probe instead
+            breaker.abandon()
+            raise
+        except Exception:
+            # unexpected errors count as failures, so a probe never leaves the circuit half-open
+            breaker.failure()
+            raise
+
+        else:
+            if response.status >= 500:
+                breaker.failure()
+            else:
+                breaker.success()
+            if lastAttempt or response.status not in policy.retryStatuses:
+                return response
+            retryAfter = parseRetryAfter(response.headers.get("Retry-After"))
+            response.release()
+
+        await asyncio.sleep(policy.delay(attempt, retryAfter))
+
+
+async def gatherRequests(*requests):
+    """Runs independent API requests concurrently, returning their results in order
+
+    Unlike a plain asyncio.gather, the remaining requests are cancelled as soon
+    as one of them fails (or the caller is cancelled, e.g. by a timeout).
+    """
+    tasks = [asyncio.ensure_future(request) for request in requests]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+class RedbackSingleFlight:
+    """Coalesces concurrent calls: callers using the same key share one in-flight call"""
+
+    def __init__(self):
+        self._inflight = {} # key: [task, number of callers waiting]
+
+    def isRunning(self, key):
+        return key in self._inflight
+
+    async def run(self, key, fn, *args):
+        """Returns fn(*args), or joins the call already in flight for key"""
+        entry = self._inflight.get(key)
+        if entry is None:
+            entry = self._inflight[key] = [asyncio.ensure_future(fn(*args)), 0]
+            entry[0].add_done_callback(lambda task: self._done(key, task))
+        entry[1] += 1
+        try:
+            # shield so that one cancelled caller does not cancel the call for the others
+            return await asyncio.shield(entry[0])
+        except asyncio.CancelledError:
+            # ... but when the last caller gives up (e.g. timeout), so does the call
+            if entry[1] == 1:
+                entry[0].cancel()
+            raise
+        finally:
+            entry[1] -= 1
+
+    def _done(self, key, task):
+        if self._inflight.get(key, [None])[0] is task:
+            del self._inflight[key]
+        # mark any exception as retrieved, callers (if any) have already seen it
+        if not task.cancelled():
+            task.exception()
+
+
+class RedbackCache:
+    """Cache for one API endpoint: TTL with stale-while-revalidate and stale-if-error
+
+    Ages use the monotonic clock, so they are unaffected by wall-clock changes.
+    A failed refresh never extends the life of the cached value.
+    """
+
+    def __init__(self, ttl, staleWhileRevalidate=0, staleIfError=0):
+        self.ttl = ttl # seconds a value is fresh
+        self.staleWhileRevalidate = staleWhileRevalidate # seconds after ttl a stale value is served while refreshing in the background
+        self.staleIfError = staleIfError # seconds after ttl a stale value is served when refreshing fails
+        self._value = None
+        self._storedAt = None # time.monotonic() value, None when empty
+        self._inflight = None
+        self.hits = 0
+        self.staleHits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def age(self):
+        """Returns the age (seconds) of the cached value, or None when empty"""
+        return None if self._storedAt is None else time.monotonic() - self._storedAt
+
+    def invalidate(self):
+        self._storedAt = None
+
+    async def get(self, fetch, forceRefresh=False):
+        """Returns the cached value, calling fetch() (a coroutine function) to refresh it as needed"""
+        age = self.age()
+        if age is not None and not forceRefresh:
+            if age < self.ttl:
+                self.hits += 1
+                return self._value
+            if age < self.ttl + self.staleWhileRevalidate:
+                self.staleHits += 1
+                self._refresh(fetch)
+                return self._value
+
+        self.misses += 1
+        try:
+            return await asyncio.shield(self._refresh(fetch))
+        except (RedbackError, RedbackConnectionError):
+            # auth errors (RedbackAPIError) are never hidden behind stale data
+            if age is not None and age < self.ttl + self.staleIfError:
+                return self._value
+            raise
+
+    def _refresh(self, fetch):
+        """Single-flight refresh: concurrent callers share one request"""
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._store(fetch))
+            # counted once per refresh, however many callers share it
+            self._inflight.add_done_callback(self._refreshDone)
+        return self._inflight
+
+    async def _store(self, fetch):
+        try:
+            self._value = await fetch()
+            self._storedAt = time.monotonic()
+            return self._value
+        finally:
+            self._inflight = None
+
+    def _refreshDone(self, task):
+        # failed refreshes are counted (this also retrieves the exception of a background
+        # revalidation nobody awaits), the next get() will try again
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "stale_hits": self.staleHits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "age": self.age(),
+        }
+
+
+class RedbackTokenManager:
+    """OAuth2 bearer token shared by every inverter (site) using the same client_id"""
+
+    _authURL = "https://api.redbacktech.com/Api/v2/Auth/token"
+    _expiryOffset = 300 # treat the token as expired this many seconds early, allowing for transaction timeout
+    _refreshLead = 60 # refresh in the background this many seconds before the token is treated as expired
+    _managers = {}
+    # optional callback(token, expiresAt) for persisting tokens, expiresAt in epoch seconds (None, None = invalidated)
+    onToken = None
+
+    @classmethod
+    def forClient(cls, client_id, client_secret):
+        """Returns the shared token manager for an OAuth2 client_id (bytes)"""
+        manager = cls._managers.get(client_id)
+        if manager is None or manager._clientSecret != client_secret:
+            # new client, or credentials changed (e.g. reauth): start afresh
+            manager = cls(client_id, client_secret)
+            cls._managers[client_id] = manager
+        return manager
+
+    def __init__(self, client_id, client_secret):
+        self._clientId = client_id
+        self._clientSecret = client_secret
+        self._session = None
+        self._retryPolicy = None
+        self._token = ""
+        self._expiry = 0.0 # time.monotonic() value
+        self._inflight = None
+        self._refreshTimer = None
+        self._used = False
+
+    def restoreToken(self, token, expiresAt):
+        """Reuses a token saved by a previous run (expiresAt in epoch seconds), returns True if still valid"""
+        remaining = expiresAt - time.time()
+        if self._token or not token or remaining <= 0:
+            return False
+        self._token = token
+        self._expiry = time.monotonic() + remaining
+        self._scheduleRefresh(remaining - self._refreshLead)
+        return True
+
+    def invalidate(self):
+        """Forgets the current token (e.g. rejected with 401), so the next request fetches a new one"""
+        self._token = ""
+        self._expiry = 0.0
+        if self.onToken is not None:
+            self.onToken(None, None)
+
+    async def getToken(self, session, retryPolicy=None):
+        """Returns an active bearer token, waiting only if there is no valid token"""
+        self._session = session
+        self._retryPolicy = retryPolicy
+        self._used = True
+        if self._token and time.monotonic() < self._expiry:
+            return self._token
+        return await self._refresh()
+
+    async def _refresh(self):
+        """Single-flight token refresh: concurrent callers all wait on one request"""
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._fetchToken())
+            self._inflight.add_done_callback(self._refreshDone)
+        # shield so that a cancelled caller does not cancel the shared request
+        return await asyncio.shield(self._inflight)
+
+    def _refreshDone(self, task):
+        self._inflight = None
+        # mark any exception as retrieved, callers (if any) have already seen it
+        if not task.cancelled():
+            task.exception()
+
+    def _scheduleRefresh(self, delay):
+        if self._refreshTimer is not None:
+            self._refreshTimer.cancel()
+        self._refreshTimer = asyncio.get_running_loop().call_later(max(delay, 1), self._backgroundRefresh)
+
+    def _backgroundRefresh(self):
+        self._refreshTimer = None
+        # stop refreshing once nobody is using this client any more (e.g. entries unloaded)
+        if not self._used:
+            return
+        self._used = False
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._fetchToken())
+            self._inflight.add_done_callback(self._refreshDone)
+
+    async def _fetchToken(self):
+        """Requests a new OAuth2 bearer token from the public API"""
+        full_url = self._authURL
+        data = b'client_id=' + self._clientId + b'&client_secret=' + self._clientSecret
+        headers = { "Content-Type": "application/x-www-form-urlencoded" }
+
+        # 400 Bad Request = client_id not found
+        # 401 Unauthorized = client_secret incorrect
+        # the JSON body's "error" key defines the error type (https://www.oauth.com/oauth2-servers/access-tokens/access-token-response/)
+        response = await apiSend(self._session, "POST", full_url, self._retryPolicy, data=data, headers=headers)
+        if response.status >= 500 or response.status == 429:
+            raise RedbackError(f"HTTP OAuth2 Error. {response.status} {response.reason}")
+
+        # collect data packet
+        try:
+            data = await response.json()
+        except JSONDecodeError as e:
+            raise RedbackAPIError(
+                f"JSON Error. {e.msg}. Pos={e.pos} Line={e.lineno} Col={e.colno}"
+            ) from e
+
+        # build authorization string
+        # (KeyError means the auth was unsuccessful)
+        try:
+            self._token = data['token_type'] + ' ' + data['access_token']
+        except KeyError as e:
+            raise RedbackAPIError(
+                f"OAuth2 Error. {data['error']}: {data['error_description']}"
+            )
+
+        # set expiry, allowing an offset for potential transaction timeout, and
+        # refresh ahead of that so data requests never have to wait for a token
+        lifetime = int(data['expires_in']) - self._expiryOffset
+        self._expiry = time.monotonic() + lifetime
+        self._scheduleRefresh(lifetime - self._refreshLead)
+        if self.onToken is not None:
+            self.onToken(self._token, time.time() + lifetime)
+
+        return self._token
 
 
 class RedbackInverter:
@@ -31,22 +461,40 @@ class RedbackInverter:
     _apiCookie = ""
     _OAuth2_client_id = ""
     _OAuth2_client_secret = ""
-    _OAuth2_bearer_token = ""
-    _OAuth2_expiry_offset = 300
-    _OAuth2_next_update = datetime.now()
+    _tokenManager = None
     _apiResponse = "json"
     _inverterInfo = None
     _energyData = None
-    _energyDataUpdateInterval = timedelta(minutes=1)
-    _energyDataNextUpdate = datetime.now()
-    _inverterInfoUpdateInterval = timedelta(minutes=15)
-    _inverterInfoNextUpdate = datetime.now()
+    _dynamicMetadata = None
+    _transferStats = None
+    # dynamic data API version and what it provides for this site, see negotiateApiVersion()
+    capabilities = None
+    # dynamic data endpoints (without, with metadata) for each API version, newest first
+    _dynamicEndpoints = {
+        "v2.21": ("public_DynamicData", "public_DynamicDataMetadata"),
+        "v2": ("public_DynamicDataV2", "public_DynamicDataV2Metadata"),
+    }
+    # HTTP statuses meaning a site does not support an API version (anything else, e.g. a 5xx
+    # or a bad response, is a transient failure and must not downgrade the site)
+    _unsupportedVersionStatuses = (400, 404, 405)
+    # a site which fell back to an older API version is probed for the newest one again this often (seconds)
+    versionReprobeInterval = 6 * 3600
+    _versionReprobeAt = None
+    # cache name: (TTL, stale-while-revalidate, stale-if-error) in seconds, see RedbackCache
+    _cacheSettings = {
+        "sites": (86400, 0, 604800),
+        "static": (900, 300, 3600),
+    }
+    # endpoint: (URL template, query parameters), see buildEndpoints()
     _apiPublicRequestMap = {
-        "public_Auth": "https://api.redbacktech.com/Api/v2/Auth/token",
-        "public_BasicData": "https://api.redbacktech.com/Api/v2/EnergyData/With/Nodes",
-        "public_StaticData": "https://api.redbacktech.com/Api/v2/EnergyData/{self.siteId}/Static",
-        "public_DynamicData": "https://api.redbacktech.com/Api/v2.21/EnergyData/{self.siteId}/Dynamic?metadata=true",
-        "public_DynamicDataV2": "https://api.redbacktech.com/Api/v2/EnergyData/{self.siteId}/Dynamic?metadata=true"
+        "public_Auth": (RedbackTokenManager._authURL, {}),
+        "public_BasicData": ("https://api.redbacktech.com/Api/v2/EnergyData/With/Nodes", {}),
+        "public_StaticData": ("https://api.redbacktech.com/Api/v2/EnergyData/{siteId}/Static", {}),
+        # metadata (permalink, Back/Forward links) is only requested when needed, e.g. for history
+        "public_DynamicData": ("https://api.redbacktech.com/Api/v2.21/EnergyData/{siteId}/Dynamic", {}),
+        "public_DynamicDataMetadata": ("https://api.redbacktech.com/Api/v2.21/EnergyData/{siteId}/Dynamic", {"metadata": "true"}),
+        "public_DynamicDataV2": ("https://api.redbacktech.com/Api/v2/EnergyData/{siteId}/Dynamic", {}),
+        "public_DynamicDataV2Metadata": ("https://api.redbacktech.com/Api/v2/EnergyData/{siteId}/Dynamic", {"metadata": "true"}),
     }
     _ordinalMap = {
         "first": 1,
@@ -61,9 +509,19 @@ class RedbackInverter:
         "tenth": 10,
     }
 
-    def __init__(self, auth_id, auth, apimethod, session, site_index=1):
-        """Constructor: needs API details (public = OAuth2 client_id and secret, private = auth cookie and inverter serial number)"""
+    def __init__(self, auth_id, auth, apimethod, session, site_index=1, retry_policy=None, cache_settings=None):
+        """Constructor: needs API details (public = OAuth2 client_id and secret, private = auth cookie and inverter serial number)
+
+        cache_settings optionally overrides _cacheSettings for some caches (e.g. a longer static data TTL)
+        """
         self._session = session
+        self._retryPolicy = retry_policy
+        self._transferStats = {}
+        self._flights = RedbackSingleFlight()
+        self.caches = {
+            name: RedbackCache(ttl, staleWhileRevalidate, staleIfError)
+            for name, (ttl, staleWhileRevalidate, staleIfError) in {**self._cacheSettings, **(cache_settings or {})}.items()
+        }
         self._apiPrivate = (apimethod == 'private') # Public API vs Private API
         if type(site_index) is str:
             self.siteIndex = self._ordinalMap.get(site_index.lower(), 1)
@@ -81,6 +539,8 @@ class RedbackInverter:
         else:
             self._OAuth2_client_id = auth_id.encode()
             self._OAuth2_client_secret = auth.encode()
+            # bearer token is shared with other sites using the same client_id
+            self._tokenManager = RedbackTokenManager.forClient(self._OAuth2_client_id, self._OAuth2_client_secret)
 
     def isPrivateAPI(self):
         return self._apiPrivate
@@ -91,73 +551,20 @@ class RedbackInverter:
         inverter_info = await self.getInverterInfo()
         return inverter_info.get("BatteryCount", 0) > 0
 
+    def getTokenManager(self):
+        """Returns the shared OAuth2 token manager (None for the private API)"""
+        return self._tokenManager
+
     async def _apiGetBearerToken(self):
         """Returns an active OAuth2 bearer token for use with public API methods"""
-
-        # do we need to request a new bearer token?
-        if datetime.now() > self._OAuth2_next_update:
-            full_url = self._apiPublicRequestMap["public_Auth"]
-            data = b'client_id=' + self._OAuth2_client_id + b'&client_secret=' + self._OAuth2_client_secret
-            headers = { "Content-Type": "application/x-www-form-urlencoded" }
-
-            # retry API request if connection error
-            retries = 3
-            for i in range(retries):
-                try:
-                    response = await self._session.post(url=full_url, data=data, headers=headers) 
-
-                except aiohttp.ClientConnectorError as e:
-                    # retry logic for error "Cannot connect to host api.redbacktech.com:443 ssl:default [Try again]"
-                    if i < retries-1:
-                        continue
-                    else:
-                        raise RedbackConnectionError(
-                            f"HTTP OAuth2 Connection Error. {e}"
-                        ) from e
-                except aiohttp.ClientResponseError as e:
-                    raise RedbackError(
-                        f"HTTP Response Error. {e.code} {e.reason}"
-                    ) from e
-                except HTTPError as e:
-                    # 400 Bad Request = client_id not found
-                    # 401 Unauthorized = client_secret incorrect
-                    # 404 Not Found = bad endpoint
-                    # e.read().decode() returns Unicode string JSON, the "error" key defines the error type (https://www.oauth.com/oauth2-servers/access-tokens/access-token-response/)
-                    raise RedbackError(
-                        f"HTTP Error. {e.code} {e.reason}"
-                    ) from e
-                except URLError as e:
-                    # If we get here, the URL is wrong or down
-                    raise RedbackError(
-                        f"URL Error. {e.reason}"
-                    ) from e
-
-                break
-
-            # collect data packet
-            try:
-                data = await response.json()
-            except JSONDecodeError as e:
-                raise RedbackAPIError(
-                    f"JSON Error. {e.msg}. Pos={e.pos} Line={e.lineno} Col={e.colno}"
-                ) from e
-
-            # build authorization string
-            # (KeyError means the auth was unsuccessful)
-            try:
-                self._OAuth2_bearer_token = data['token_type'] + ' ' + data['access_token']
-            except KeyError as e:
-                raise RedbackAPIError(
-                    f"OAuth2 Error. {data['error']}: {data['error_description']}"
-                )
-
-            # set update timeout, allowing an offset for potential transaction timeout
-            self._OAuth2_next_update = datetime.now() + timedelta(seconds=int(data['expires_in']) - self._OAuth2_expiry_offset)
-
-        return self._OAuth2_bearer_token
+        return await self._tokenManager.getToken(self._session, self._retryPolicy)
 
     async def _apiRequest(self, endpoint):
-        """Call into Redback cloud API"""
+        """Call into Redback cloud API (concurrent calls for the same endpoint share one request)"""
+        return await self._flights.run(endpoint, self._apiCall, endpoint)
+
+    async def _apiCall(self, endpoint):
+        """Call into Redback cloud API, one request"""
 
         request_headers = {}
         full_url = ""
@@ -166,9 +573,15 @@ class RedbackInverter:
         if endpoint.startswith("public_"):
             if not self.siteId and endpoint != "public_BasicData":
                 self.siteId = await self.getSiteId()
-            full_url = self._apiPublicRequestMap[endpoint]
-            full_url = eval(f"f'{full_url}'") # replace {vars} in full_url
+            full_url = buildEndpoints(self.siteId)[endpoint]
             request_headers = {"authorization": await self._apiGetBearerToken()} 
+            try:
+                return await self._apiFetch(full_url, request_headers, endpoint)
+            except RedbackUnauthorizedError:
+                # the token may have been revoked, or restored from a previous run past its
+                # real expiry: try once more with a new token before giving up
+                self._tokenManager.invalidate()
+                request_headers = {"authorization": await self._apiGetBearerToken()}
 
         # Private API endpoint
         else:
@@ -180,46 +593,35 @@ class RedbackInverter:
                 # https://portal.redbacktech.com/api/v2/inverterinfo?SerialNumber=$SERIAL
                 full_url = self._apiBaseURL + endpoint + self._apiSerial
 
-        # retry API request if connection error
-        retries = 3
-        for i in range(retries):
-            try:
-                response = await self._session.get(full_url, headers=request_headers) 
+        return await self._apiFetch(full_url, request_headers, endpoint)
 
-            except aiohttp.ClientConnectorError as e:
-                # retry logic for error "Cannot connect to host api.redbacktech.com:443 ssl:default [Try again]"
-                if i < retries-1:
-                    continue
-                else:
-                    raise RedbackConnectionError(
-                        f"HTTP Connection Error. {e}"
-                    ) from e
-            except aiohttp.ClientResponseError as e:
-                raise RedbackError(
-                    f"HTTP Response Error. {e.code} {e.reason}"
-                ) from e
-            except HTTPError as e:
-                raise RedbackError(
-                    f"HTTP Error. {e.code} {e.reason}"
-                ) from e
-            except URLError as e:
-                raise RedbackError(f"URL Error. {e.reason}") from e
+    async def _apiFetch(self, full_url, request_headers, statsKey="history"):
+        """GET a Redback cloud API URL and return the decoded JSON (response sizes are counted under statsKey)"""
 
-            break
+        response = await apiSend(self._session, "GET", full_url, self._retryPolicy, headers=request_headers)
 
         # check for HTTP error codes (e.g. expired credentials, invalid serial, server error)
         if not response.ok:
             message = await response.text()
             # 500 Internal Server Error, 502 Bad Gateway, etc. seem to indicate a temporary error state within the Redback API service
-            if 500 <= int(response.status) < 600:
+            # (as does 429 Too Many Requests, once our retries are exhausted)
+            if 500 <= int(response.status) < 600 or int(response.status) == 429:
                 raise RedbackError(f"{response.status} {response.reason}. {message}")
+            # 404 Not Found is expected for historical requests with no data
+            elif int(response.status) == 404:
+                raise RedbackNotFoundError(f"{response.status} {response.reason}. {message}", status=response.status)
+            # 401 Unauthorized means expired credentials, or a bearer token which is no longer valid
+            elif int(response.status) == 401:
+                raise RedbackUnauthorizedError(f"{response.status} {response.reason}. {message}", status=response.status)
             # otherwise, it is probably a 4XX error meaning we most likely have expired credentials
             else:
-                raise RedbackAPIError(f"{response.status} {response.reason}. {message}")
+                raise RedbackAPIError(f"{response.status} {response.reason}. {message}", status=response.status)
 
-        # collect data packet
+        # collect data packet (aiohttp asks for gzip/deflate and decompresses transparently)
+        body = await response.read()
+        self._countTransfer(statsKey, response, len(body))
         try:
-            data = await response.json()
+            data = json.loads(body)
         except JSONDecodeError as e:
             raise RedbackAPIError(
                 f"JSON Error. {e.msg}. Pos={e.pos} Line={e.lineno} Col={e.colno}"
@@ -227,6 +629,36 @@ class RedbackInverter:
 
         return data
 
+    def _countTransfer(self, statsKey, response, size):
+        """Counts response sizes: decoded bytes, and bytes on the wire when the server says (Content-Length)"""
+        stats = self._transferStats.get(statsKey)
+        if stats is None:
+            stats = self._transferStats[statsKey] = {
+                "requests": 0, "bytes": 0, "wire_bytes": 0, "last_bytes": 0, "last_wire_bytes": None, "encoding": None,
+            }
+        wireSize = response.content_length
+        stats["requests"] += 1
+        stats["bytes"] += size
+        stats["last_bytes"] = size
+        stats["last_wire_bytes"] = wireSize
+        if wireSize is not None:
+            stats["wire_bytes"] += wireSize
+        stats["encoding"] = response.headers.get("Content-Encoding", "identity")
+
+    def transferStats(self):
+        """Returns response size counters for each endpoint"""
+        return {statsKey: dict(stats) for statsKey, stats in self._transferStats.items()}
+
+    async def warmConnection(self):
+        """Opens (or refreshes) a pooled connection to the API ahead of a request, so the
+        DNS lookup and TLS handshake are off the critical path. Errors are ignored."""
+        url = URL(self._apiBaseURL).origin() if self._apiPrivate else URL.build(scheme="https", host=API_HOST)
+        try:
+            response = await self._session.request("HEAD", url, timeout=API_TIMEOUT)
+            response.release()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            pass
+
     async def testConnection(self):
         """Tests the API connection, will return True or raise RedbackError or RedbackAPIError"""
 
@@ -242,113 +674,488 @@ class RedbackInverter:
         if self.siteId is not None:
             return self.siteId
 
-        index = 0
-        siteId = None
+        return self.selectSiteId(await self.getSiteIds())
+
+    async def getSiteIds(self, forceRefresh=False):
+        """Returns the IDs of every site on the account via public API (cached)"""
+        return await self.caches["sites"].get(self._fetchSiteIds, forceRefresh)
+
+    async def _fetchSiteIds(self):
         data = await self._apiRequest("public_BasicData")
-        for item in data["Data"]:
-            if item["Type"] == "Site":
-                siteId = item["Id"]
-                index += 1
-                if index >= self.siteIndex: break
-        # return the site ID at desired index, or failing that return the last site ID found
-        return siteId
-
-    async def getInverterInfo(self):
-        """Returns inverter info (static data, updated first use only)"""
-
-        # we rate-limit the inverter info updates, it is meant to be static data but some values do change
-        if datetime.now() > self._inverterInfoNextUpdate or self._inverterInfo == None:
-            self._inverterInfoNextUpdate = datetime.now() + self._inverterInfoUpdateInterval
-
-            if self._apiPrivate:
-                self._inverterInfo = await self._apiRequest("inverterinfo")
-                self._inverterInfo["ModelName"] = self._inverterInfo["Model"]
-                self._inverterInfo["FirmwareVersion"] = self._inverterInfo["Firmware"]
-                bannerInfo = await self._apiRequest("BannerInfo")
-                self._inverterInfo["ProductDisplayname"] = bannerInfo["ProductDisplayname"]
-                self._inverterInfo["InstalledPvSizeWatts"] = bannerInfo[
-                    "InstalledPvSizeWatts"
-                ]
-                self._inverterInfo["BatteryCapacityWattHours"] = bannerInfo[
-                    "BatteryCapacityWattHours"
-                ]
+        return [item["Id"] for item in data["Data"] if item["Type"] == "Site"]
 
-                # Private API keys: Model, Firmware, RossVersion, IsThreePhaseInverter, IsSmartBatteryInverter, IsSinglePhaseInverter, IsGridTieInverter, ProductDisplayname, InstalledPvSizeWatts, BatteryCapacityWattHours
+    def cacheStats(self):
+        """Returns hit/miss counters for each cache"""
+        return {name: cache.stats() for name, cache in self.caches.items()}
 
-            else:
-                dataPacket = (await self._apiRequest("public_StaticData"))["Data"]
-                staticData = dataPacket["StaticData"]
-                nodesData = dataPacket["Nodes"][0]["StaticData"] # assumes node 0 is the inverter, node 1 is usually house load
-                self._inverterInfo = staticData["SiteDetails"]
-                self._inverterInfo["RemoteAccessConnection.Type"] = staticData["RemoteAccessConnection"]["Type"]
-                self._inverterInfo["NMI"] = staticData["NMI"]
-                self._inverterInfo["CommissioningDate"] = staticData["CommissioningDate"]
-                self._inverterInfo["SiteId"] = staticData["Id"]
-                self._inverterInfo["ModelName"] = nodesData["ModelName"]
-                self._inverterInfo["BatteryCount"] = nodesData["BatteryCount"]
-                self._inverterInfo["BatteryModels"] = ','.join(nodesData["BatteryModels"])
-                self._inverterInfo["SoftwareVersion"] = nodesData["SoftwareVersion"]
-                self._inverterInfo["FirmwareVersion"] = nodesData["FirmwareVersion"]
-                self._inverterInfo["SerialNumber"] = nodesData["Id"]
-
-                # Public API keys: BatteryMaxChargePowerkW, BatteryMaxDischargePowerkW, BatteryCapacitykWh, UsableBatteryCapacitykWh, BatteryModels, PanelModel, PanelSizekW, SystemType, InverterMaxExportPowerkW, InverterMaxImportPowerkW, RemoteAccessConnection.Type, NMI, CommissioningDate, ModelName, BatteryCount, SoftwareVersion, FirmwareVersion, SerialNumber
+    def selectSiteId(self, siteIds):
+        """Returns the site ID at desired index, or failing that the last site ID found"""
+        if not siteIds:
+            return None
+        return siteIds[min(max(self.siteIndex, 1), len(siteIds)) - 1]
 
-        return self._inverterInfo
+    async def getInverterInfo(self, forceRefresh=False):
+        """Returns inverter info (static data, cached; it is meant to be static data but some values do change)"""
+        return await self.caches["static"].get(self._fetchInverterInfo, forceRefresh)
 
     async def getEnergyData(self):
         """Returns energy data (dynamic data, instantaneous with 60s resolution)"""
+        # energy data in the cloud data store is only refreshed by the Ouija device every 60s, so it
+        # is not cached: callers poll on their own schedule (concurrent calls share one request)
+        return await self._fetchEnergyData()
+
+    async def _fetchInverterInfo(self):
+        """Downloads inverter info"""
+        if self._apiPrivate:
+            self._inverterInfo, bannerInfo = await gatherRequests(
+                self._apiRequest("inverterinfo"), self._apiRequest("BannerInfo")
+            )
+            self._inverterInfo["ModelName"] = self._inverterInfo["Model"]
+            self._inverterInfo["FirmwareVersion"] = self._inverterInfo["Firmware"]
+            self._inverterInfo["ProductDisplayname"] = bannerInfo["ProductDisplayname"]
+            self._inverterInfo["InstalledPvSizeWatts"] = bannerInfo[
+                "InstalledPvSizeWatts"
+            ]
+            self._inverterInfo["BatteryCapacityWattHours"] = bannerInfo[
+                "BatteryCapacityWattHours"
+            ]
 
-        # energy data in the cloud data store is only refreshed by the Ouija device every 60s
-        if datetime.now() > self._energyDataNextUpdate or self._energyData == None:
-            self._energyDataNextUpdate = datetime.now() + self._energyDataUpdateInterval
-            if self._apiPrivate:
-                self._energyData = (await self._apiRequest("energyflowd2"))["Data"]["Input"]
+            # Private API keys: Model, Firmware, RossVersion, IsThreePhaseInverter, IsSmartBatteryInverter, IsSinglePhaseInverter, IsGridTieInverter, ProductDisplayname, InstalledPvSizeWatts, BatteryCapacityWattHours
 
-                # Private API keys: ACLoadW, BackupLoadW, SupportsConnectedPV, PVW, ThirdPartyW, GridStatus, GridNegativeIsImportW, ConfiguredWithBatteries, BatteryNegativeIsChargingW, BatteryStatus, BatterySoC0to100, CtComms
+        else:
+            dataPacket = (await self._apiRequest("public_StaticData"))["Data"]
+            staticData = dataPacket["StaticData"]
+            nodesData = dataPacket["Nodes"][0]["StaticData"] # assumes node 0 is the inverter, node 1 is usually house load
+            self._inverterInfo = staticData["SiteDetails"]
+            self._inverterInfo["RemoteAccessConnection.Type"] = staticData["RemoteAccessConnection"]["Type"]
+            self._inverterInfo["NMI"] = staticData["NMI"]
+            self._inverterInfo["CommissioningDate"] = staticData["CommissioningDate"]
+            self._inverterInfo["SiteId"] = staticData["Id"]
+            self._inverterInfo["ModelName"] = nodesData["ModelName"]
+            self._inverterInfo["BatteryCount"] = nodesData["BatteryCount"]
+            self._inverterInfo["BatteryModels"] = ','.join(nodesData["BatteryModels"])
+            self._inverterInfo["SoftwareVersion"] = nodesData["SoftwareVersion"]
+            self._inverterInfo["FirmwareVersion"] = nodesData["FirmwareVersion"]
+            self._inverterInfo["SerialNumber"] = nodesData["Id"]
+
+            # Public API keys: BatteryMaxChargePowerkW, BatteryMaxDischargePowerkW, BatteryCapacitykWh, UsableBatteryCapacitykWh, BatteryModels, PanelModel, PanelSizekW, SystemType, InverterMaxExportPowerkW, InverterMaxImportPowerkW, RemoteAccessConnection.Type, NMI, CommissioningDate, ModelName, BatteryCount, SoftwareVersion, FirmwareVersion, SerialNumber
+
+        return self._inverterInfo
+
+    async def _fetchEnergyData(self):
+        """Downloads energy data"""
+        if self._apiPrivate:
+            self._energyData = EnergySnapshot((await self._apiRequest("energyflowd2"))["Data"]["Input"])
+
+            # Private API keys: ACLoadW, BackupLoadW, SupportsConnectedPV, PVW, ThirdPartyW, GridStatus, GridNegativeIsImportW, ConfiguredWithBatteries, BatteryNegativeIsChargingW, BatteryStatus, BatterySoC0to100, CtComms
 
+        else:
+            # the API version is negotiated once, then every poll goes straight to its endpoint
+            # (polls skip the metadata, streamDynamicHistory() requests it when needed)
+            if self.capabilities is None or (
+                self._versionReprobeAt is not None and time.monotonic() >= self._versionReprobeAt
+            ):
+                data = await self.negotiateApiVersion()
             else:
-                self._energyData = (await self._apiRequest("public_DynamicData"))["Data"]
-                # convert any None (null) values to zeros
-                for key in self._energyData:
-                    if self._energyData[key] == None: self._energyData[key] = 0
-                for phase in self._energyData["Phases"]:
-                    for key in phase:
-                        if phase[key] == None: phase[key] = 0
-                # gather individual voltage and current per phase
-                for phase in self._energyData["Phases"]:
-                    self._energyData["VoltageInstantaneousV_" + phase["Id"]] = phase["VoltageInstantaneousV"]
-                    self._energyData["CurrentInstantaneousA_" + phase["Id"]] = phase["CurrentInstantaneousA"]
-                # store an average value too (by calculating total available voltage for three-phase)
-                phaseCount = len(self._energyData["Phases"])
-                self._energyData["VoltageInstantaneousV"] = round( sum(list(map(lambda x: x["VoltageInstantaneousV"], self._energyData["Phases"]))) / phaseCount * sqrt(phaseCount), 1)
-                self._energyData["ActiveExportedPowerInstantaneouskW"] = sum(list(map(lambda x: x["ActiveExportedPowerInstantaneouskW"], self._energyData["Phases"])))
-                self._energyData["ActiveImportedPowerInstantaneouskW"] = sum(list(map(lambda x: x["ActiveImportedPowerInstantaneouskW"], self._energyData["Phases"])))
-                # gather extra details from v2.21 API
-                if "Battery" in self._energyData:
-                    self._energyData["BatteryCurrentNegativeIsChargingA"] = self._energyData["Battery"]["CurrentNegativeIsChargingA"]
-                    self._energyData["BatteryVoltageV"] =  self._energyData["Battery"]["VoltageV"]
-
-                if "PVs" in self._energyData:
-                    for counter, PV in enumerate(self._energyData["PVs"]):
-                        self._energyData["PV_" + str(counter) + "_VoltageV"] = PV["VoltageV"]
-                        self._energyData["PV_" + str(counter) + "_CurrentA"] = PV["CurrentA"]
-                        self._energyData["PV_" + str(counter) + "_PowerkW"] = PV["PowerkW"]
-
-                # cleanup
-                del self._energyData["TimestampUtc"]
-                del self._energyData["SiteId"]
-                del self._energyData["Inverters"]
-                del self._energyData["Phases"]
-                del self._energyData["Battery"]
-                del self._energyData["PVs"]
-
-                # Public API keys: FrequencyInstantaneousHz, BatterySoCInstantaneous0to1, PvPowerInstantaneouskW, InverterTemperatureC, BatteryPowerNegativeIsChargingkW, PvAllTimeEnergykWh, ExportAllTimeEnergykWh, ImportAllTimeEnergykWh, LoadAllTimeEnergykWh, Status, VoltageInstantaneousV, ActiveExportedPowerInstantaneouskW, ActiveImportedPowerInstantaneouskW
+                data = (await self._apiRequest(self._dynamicEndpoints[self.capabilities["version"]][0]))["Data"]
+            self._energyData = normaliseDynamicData(data)
+            self._checkCapabilities(self._energyData)
+
+            # Public API keys: TimestampUtc, FrequencyInstantaneousHz, BatterySoCInstantaneous0to1, PvPowerInstantaneouskW, InverterTemperatureC, BatteryPowerNegativeIsChargingkW, PvAllTimeEnergykWh, ExportAllTimeEnergykWh, ImportAllTimeEnergykWh, LoadAllTimeEnergykWh, Status, VoltageInstantaneousV, ActiveExportedPowerInstantaneouskW, ActiveImportedPowerInstantaneouskW (and per phase analytics, see EnergySnapshot.analytics)
 
         return self._energyData
 
+    async def negotiateApiVersion(self):
+        """Finds the newest dynamic data API version the site supports and what it provides
+
+        Sets self.capabilities, e.g. {"version": "v2.21", "pvs": 2, "battery": True, "modules": True},
+        and returns the dynamic data record downloaded while probing.
+        """
+        versions = list(self._dynamicEndpoints)
+        for version in versions:
+            try:
+                data = (await self._apiRequest(self._dynamicEndpoints[version][0]))["Data"]
+            except RedbackAPIError as err:
+                # only 400/404/405 mean this version is not available for the site, try an older one
+                if err.status not in self._unsupportedVersionStatuses or version == versions[-1]:
+                    raise
+                continue
+            # an older version is only used for a while, then the newest is tried again
+            self._versionReprobeAt = (
+                None if version == versions[0] else time.monotonic() + self.versionReprobeInterval
+            )
+            self.capabilities = {
+                "version": version,
+                "pvs": len(data.get("PVs") or ()),
+                "battery": bool(data.get("Battery")),
+                "modules": bool((data.get("Battery") or {}).get("Modules")),
+            }
+            return data
+
+    def restoreCapabilities(self, capabilities):
+        """Reuses the API version and capabilities found by a previous run (skips negotiation)
+
+        Only the newest version is reused; a site which fell back to an older one is
+        probed again after a restart, in case the fallback was caused by a passing fault.
+        """
+        if capabilities and capabilities.get("version") == next(iter(self._dynamicEndpoints)):
+            self.capabilities = dict(capabilities)
+
+    def _checkCapabilities(self, snapshot):
+        """Keeps the capabilities up to date if the site changes (e.g. a battery is added)"""
+        capabilities = self.capabilities
+        pvs = len(snapshot.rawPVs)
+        battery = bool(snapshot.rawBattery)
+        if capabilities["version"] != "v2" and (capabilities["pvs"] != pvs or capabilities["battery"] != battery):
+            self.capabilities = {
+                **capabilities,
+                "pvs": pvs,
+                "battery": battery,
+                "modules": battery and bool(snapshot.rawBattery.get("Modules")),
+            }
+
+    async def streamDynamicHistory(self, start, end, step=timedelta(minutes=1), concurrency=4):
+        """Async generator of historical dynamic data records (oldest first) for start < TimestampUtc <= end
+
+        Follows the Back links in the dynamic data metadata: the "LatestBeforeUtc" link
+        template is learned from the latest record, then one request is made per step
+        (at most `concurrency` in flight at once). Records are yielded as raw "Data"
+        dicts, each record once only.
+        """
+        if self._apiPrivate:
+            raise RedbackAPIError("Historical data is only available via the public API")
+
+        # learn the link template from the latest record's metadata
+        if not self._dynamicMetadata:
+            version = (self.capabilities or {}).get("version", "v2.21")
+            self._dynamicMetadata = (await self._apiRequest(self._dynamicEndpoints[version][1])).get("Metadata")
+        backLink = ((self._dynamicMetadata or {}).get("Back") or {}).get("1m")
+        match = re.search(r"\d{8}T\d{6}Z", backLink) if isinstance(backLink, str) else None
+        if match is None:
+            # not learned, so fetch the metadata again next time
+            self._dynamicMetadata = None
+            if not backLink:
+                raise RedbackAPIError("Dynamic data metadata has no Back links")
+            raise RedbackAPIError(f"Dynamic data Back link has no timestamp: {backLink!r}")
+        prefix, suffix = backLink[:match.start()], backLink[match.end():]
+        baseURL = URL.build(scheme="https", host=API_HOST)
+        headers = {"authorization": await self._apiGetBearerToken()}
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetchBefore(timestamp):
+            url = baseURL.join(URL(prefix + timestamp.strftime("%Y%m%dT%H%M%SZ") + suffix))
+            async with semaphore:
+                try:
+                    data = (await self._apiFetch(url, headers))["Data"]
+                except RedbackNotFoundError:
+                    return []
+            return data if isinstance(data, list) else [data]
+
+        seen = set()
+        batchSize = concurrency * 4
+        timestamp = start + step
+        while timestamp <= end:
+            timestamps = []
+            while timestamp <= end and len(timestamps) < batchSize:
+                timestamps.append(timestamp)
+                timestamp += step
+
+            # the bearer token may have been refreshed in the background meanwhile
+            headers["authorization"] = await self._apiGetBearerToken()
+            batches = await asyncio.gather(*(fetchBefore(t) for t in timestamps))
+
+            records = []
+            for record in (record for batch in batches for record in batch):
+                recordTime = parseTimestamp(record.get("TimestampUtc"))
+                if recordTime is None or recordTime in seen or not (start < recordTime <= end):
+                    continue
+                seen.add(recordTime)
+                records.append((recordTime, record))
+            for _, record in sorted(records, key=lambda item: item[0]):
+                yield record
+
+@dataclass(slots=True)
+class PhaseData:
+    """One grid phase of a dynamic data record"""
+    id: str
+    voltageV: float
+    currentA: float
+    exportedkW: float
+    importedkW: float
+    powerFactor: float
+
+@dataclass(slots=True)
+class PVData:
+    """One PV string of a dynamic data record"""
+    voltageV: float
+    currentA: float
+    powerkW: float
+
+@dataclass(slots=True)
+class BatteryModuleData:
+    """One battery module of a dynamic data record"""
+    voltageV: float
+    currentNegativeIsChargingA: float
+    powerNegativeIsChargingkW: float
+    soc0to1: float
+
+@dataclass(slots=True)
+class BatteryData:
+    """Battery details of a dynamic data record (v2.21 API)"""
+    voltageV: float
+    currentNegativeIsChargingA: float
+    rawModules: tuple = ()
+
+    @property
+    def modules(self):
+        """Per-module details, typed on demand (no sensor needs them every update)"""
+        return tuple(
+            BatteryModuleData(
+                module.get("VoltageV") or 0,
+                module.get("CurrentNegativeIsChargingA") or 0,
+                module.get("PowerNegativeIsChargingkW") or 0,
+                module.get("SoC0To1") or 0,
+            )
+            for module in self.rawModules
+        )
+
+@dataclass(slots=True)
+class EnergySnapshot(Mapping):
+    """One normalised dynamic data record
+
+    Acts as a read-only mapping of the flattened keys used by sensors (e.g.
+    "VoltageInstantaneousV_A"), and keeps the record's per-phase, per-PV and
+    battery sections, typed on demand (only the metadata and diagnostics need them).
+    """
+    values: dict
+    timestamp: str = None
+    siteId: str = None
+    rawPhases: tuple = ()
+    rawPVs: tuple = ()
+    rawBattery: dict = None
+    _analytics: dict = field(default=None, init=False, repr=False, compare=False)
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __contains__(self, key):
+        return key in self.values
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    @property
+    def phases(self):
+        return tuple(
+            PhaseData(
+                phase["Id"],
+                phase.get("VoltageInstantaneousV") or 0,
+                phase.get("CurrentInstantaneousA") or 0,
+                phase.get("ActiveExportedPowerInstantaneouskW") or 0,
+                phase.get("ActiveImportedPowerInstantaneouskW") or 0,
+                phase.get("PowerFactorInstantaneousMinus1to1") or 0,
+            )
+            for phase in self.rawPhases
+        )
+
+    @property
+    def pvs(self):
+        return tuple(
+            PVData(PV.get("VoltageV") or 0, PV.get("CurrentA") or 0, PV.get("PowerkW") or 0)
+            for PV in self.rawPVs
+        )
+
+    @property
+    def battery(self):
+        if not self.rawBattery:
+            return None
+        return BatteryData(
+            self.rawBattery.get("VoltageV") or 0,
+            self.rawBattery.get("CurrentNegativeIsChargingA") or 0,
+            tuple(self.rawBattery.get("Modules") or ()),
+        )
+
+    @property
+    def analytics(self):
+        """Per-phase analytics, worked out on first access (their sensors are disabled by default)
+
+        Each phase's active (kW, positive = import), apparent (VA) and reactive (var) power
+        and power factor (e.g. "ActivePowerkW_A"), with the PhaseImbalancePercent and
+        NeutralCurrentA of the site; empty when the record has no Phases.
+        """
+        if self._analytics is None:
+            self._analytics = phaseAnalytics(self.rawPhases) if self.rawPhases else {}
+        return self._analytics
+
+
+# sections of a dynamic data record which are flattened (or dropped) rather than copied
+_DYNAMIC_SECTIONS = frozenset(("Phases", "PVs", "Battery", "SiteId", "Inverters"))
+# all-time counters stay null rather than reading as zero, which would look like a meter reset
+_DYNAMIC_COUNTERS = frozenset((
+    "PvAllTimeEnergykWh",
+    "LoadAllTimeEnergykWh",
+    "ExportAllTimeEnergykWh",
+    "ImportAllTimeEnergykWh",
+    "BatteryChargeAllTimeEnergykWh",
+    "BatteryDischargeAllTimeEnergykWh",
+))
+
+
+def normaliseDynamicData(data):
+    """Single pass over a public API dynamic data record, returns an EnergySnapshot
+
+    Only the flattened keys are built here; the typed per-phase, per-PV and battery
+    objects and the per-phase analytics are built on demand from the raw sections.
+    """
+    # convert any None (null) values to zeros, except the all-time counters
+    values = {
+        key: value if value is not None else None if key in _DYNAMIC_COUNTERS else 0
+        for key, value in data.items()
+        if key not in _DYNAMIC_SECTIONS
+    }
+
+    phases = tuple(data.get("Phases") or ())
+    if "Phases" in data:
+        voltageTotal = exportedTotal = importedTotal = 0
+        for phase in phases:
+            # individual voltage and current per phase
+            voltageV = phase.get("VoltageInstantaneousV") or 0
+            voltageKey, currentKey = phaseKeys(phase["Id"])
+            values[voltageKey] = voltageV
+            values[currentKey] = phase.get("CurrentInstantaneousA") or 0
+            voltageTotal += voltageV
+            exportedTotal += phase.get("ActiveExportedPowerInstantaneouskW") or 0
+            importedTotal += phase.get("ActiveImportedPowerInstantaneouskW") or 0
+        # store an average value too (by calculating total available voltage for three-phase)
+        phaseCount = len(phases)
+        values["VoltageInstantaneousV"] = round(voltageTotal / phaseCount * sqrt(phaseCount), 1) if phaseCount else 0
+        values["ActiveExportedPowerInstantaneouskW"] = exportedTotal
+        values["ActiveImportedPowerInstantaneouskW"] = importedTotal
+
+    pvs = tuple(data.get("PVs") or ())
+    for counter, PV in enumerate(pvs):
+        voltageKey, currentKey, powerKey = pvKeys(counter)
+        values[voltageKey] = PV.get("VoltageV") or 0
+        values[currentKey] = PV.get("CurrentA") or 0
+        values[powerKey] = PV.get("PowerkW") or 0
+
+    battery = data.get("Battery") or None
+    if battery:
+        values["BatteryCurrentNegativeIsChargingA"] = battery.get("CurrentNegativeIsChargingA") or 0
+        values["BatteryVoltageV"] = battery.get("VoltageV") or 0
+
+    return EnergySnapshot(values, data.get("TimestampUtc"), data.get("SiteId"), phases, pvs, battery)
+
+
+def phaseAnalytics(phases):
+    """Returns the per-phase analytics of a record's Phases, see EnergySnapshot.analytics"""
+    analytics = {}
+    currents = []
+    for phase in phases:
+        voltageV = phase.get("VoltageInstantaneousV") or 0
+        currentA = phase.get("CurrentInstantaneousA") or 0
+        powerFactor = phase.get("PowerFactorInstantaneousMinus1to1") or 0
+        activekW = (phase.get("ActiveImportedPowerInstantaneouskW") or 0) - (phase.get("ActiveExportedPowerInstantaneouskW") or 0)
+        apparentVA = voltageV * currentA
+        # the power factor is the one reported by the cloud, or active over apparent power when it reports none
+        if not powerFactor and apparentVA:
+            powerFactor = max(-1.0, min(1.0, activekW * 1000 / apparentVA))
+        activeKey, apparentKey, reactiveKey, powerFactorKey = phaseAnalyticsKeys(phase["Id"])
+        analytics[activeKey] = activekW
+        analytics[apparentKey] = apparentVA
+        analytics[reactiveKey] = apparentVA * sqrt(max(0.0, 1 - powerFactor * powerFactor))
+        analytics[powerFactorKey] = powerFactor
+        currents.append(currentA)
+    analytics["PhaseImbalancePercent"] = phaseImbalance(currents)
+    analytics["NeutralCurrentA"] = neutralCurrent(currents)
+    return analytics
+
+
+@lru_cache(maxsize=None)
+def phaseKeys(phaseId):
+    """Returns the per-phase voltage and current data keys for a phase ID, built once per phase"""
+    return ("VoltageInstantaneousV_" + phaseId, "CurrentInstantaneousA_" + phaseId)
+
+
+@lru_cache(maxsize=None)
+def phaseAnalyticsKeys(phaseId):
+    """Returns the per-phase analytics keys for a phase ID, built once per phase"""
+    return tuple(name + "_" + phaseId for name in ("ActivePowerkW", "ApparentPowerVA", "ReactivePowervar", "PowerFactor"))
+
+
+@lru_cache(maxsize=None)
+def pvKeys(counter):
+    """Returns the per-PV data keys for a PV index, built once per PV"""
+    return tuple("PV_" + str(counter) + "_" + name for name in ("VoltageV", "CurrentA", "PowerkW"))
+
+
+def phaseImbalance(currents):
+    """Returns the current imbalance (%): the largest deviation from the average phase current, over the average"""
+    if len(currents) < 2:
+        return 0
+    average = sum(currents) / len(currents)
+    if not average:
+        return 0
+    return max(abs(current - average) for current in currents) / average * 100
+
+
+def neutralCurrent(currents):
+    """Returns an estimate of the neutral current (A)
+
+    Single phase: the neutral carries the phase current. Three phase: the phasor sum of
+    the phase currents, taking them as 120 degrees apart (i.e. ignoring power factor).
+    """
+    if len(currents) != 3:
+        return sum(currents)
+    a, b, c = currents
+    return sqrt(max(0.0, a * a + b * b + c * c - a * b - b * c - c * a))
+
+
+def changedKeys(old, new):
+    """Return the keys whose values differ between two records (added and removed keys included)"""
+    if old is None or new is None:
+        return set((old or {}).keys()) | set((new or {}).keys())
+    missing = object()
+    changed = {key for key, value in new.items() if old.get(key, missing) != value}
+    changed.update(key for key in old if key not in new)
+    return changed
+
+
+@lru_cache(maxsize=None)
+def buildEndpoints(siteId):
+    """Returns the public API endpoint URLs for a site, built once per site and then cached"""
+    # the site ID is quoted as a single path segment, it can never alter the rest of the URL
+    siteSegment = quote(str(siteId), safe="")
+    return MappingProxyType({
+        endpoint: URL(template.format(siteId=siteSegment), encoded=True).with_query(params)
+        for endpoint, (template, params) in RedbackInverter._apiPublicRequestMap.items()
+    })
+
+def parseTimestamp(value):
+    """Returns a timezone-aware datetime for an API timestamp (e.g. "2024-12-10T22:47:40Z"), or None"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (TypeError, ValueError):
+        return None
+
 class TestRedbackInverter(RedbackInverter):
     """Test class for Redback Inverter integration, returns sample data without any API calls"""
 
+    async def warmConnection(self):
+        pass
+
+    async def _apiFetch(self, full_url, request_headers, statsKey="history"):
+        # no historical data in test mode
+        raise RedbackNotFoundError(f"TestRedbackInverter: no data for {full_url}", status=404)
+
     async def _apiRequest(self, endpoint):
         if endpoint == "inverterinfo":
             return {
@@ -538,7 +1345,7 @@ class TestRedbackInverter(RedbackInverter):
                     ]
                 }
             }
-        elif endpoint == "public_DynamicData":
+        elif endpoint.startswith("public_DynamicData"):
             return {
                 "Data": {
                     "TimestampUtc": "2024-12-10T22:47:40Z",
@@ -661,4 +1468,4 @@ class TestRedbackInverter(RedbackInverter):
                 }
             }
         else:
-            raise RedbackAPIError(f"TestRedbackInverter: unknown API endpoint {endpoint}")
+            raise RedbackAPIError(f"TestRedbackInverter: unknown API endpoint {endpoint}", status=404)
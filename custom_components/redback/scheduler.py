@@ -0,0 +1,197 @@
+"""Polling scheduler for the Redback integration.
+
+The Ouija device uploads a new dynamic data record roughly once a minute. The
+scheduler learns the upload cadence and phase from the records' TimestampUtc,
+then schedules each poll shortly after the next record should be available,
+instead of polling on a fixed timer that drifts against the uploads.
+
+Polling also adapts to site activity: while there is no PV generation and
+little change between records (e.g. overnight), every other record is skipped,
+then three in four and so on up to a ceiling, staying phase-locked to the
+uploads. Any activity returns to polling every record.
+"""
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from math import ceil, floor
+from statistics import median
+from typing import Any
+
+# power readings which show site activity: data key -> scale to kW
+ACTIVITY_KEYS = {
+    # public API
+    "PvPowerInstantaneouskW": 1,
+    "BatteryPowerNegativeIsChargingkW": 1,
+    "ActiveExportedPowerInstantaneouskW": 1,
+    "ActiveImportedPowerInstantaneouskW": 1,
+    # private API
+    "PVW": 0.001,
+    "BatteryNegativeIsChargingW": 0.001,
+    "GridNegativeIsImportW": 0.001,
+    "ACLoadW": 0.001,
+}
+PV_KEYS = ("PvPowerInstantaneouskW", "PVW")
+
+
+def site_is_active(
+    previous: Mapping[str, Any] | None,
+    current: Mapping[str, Any],
+    pv_threshold: float,
+    change_threshold: float,
+) -> bool:
+    """Return True if the site is generating, or any power reading changed noticeably (kW)."""
+    if previous is None:
+        return True
+    for key in PV_KEYS:
+        if (current.get(key) or 0) * ACTIVITY_KEYS[key] > pv_threshold:
+            return True
+    for key, scale in ACTIVITY_KEYS.items():
+        if abs(((current.get(key) or 0) - (previous.get(key) or 0)) * scale) > change_threshold:
+            return True
+    return False
+
+
+class RedbackPollScheduler:
+    """Phase-locked poll scheduler for one site."""
+
+    PROBE_HOLDOFF = 30 # records to wait after a retry before probing for an earlier phase again
+
+    def __init__(
+        self,
+        default_interval: timedelta,
+        retry_interval: timedelta,
+        max_retries: int,
+        margin: timedelta,
+        min_interval: timedelta | None = None,
+        max_interval: timedelta | None = None,
+    ) -> None:
+        """Initialize the scheduler."""
+        self.default_interval = default_interval
+        self.retry_interval = retry_interval
+        self.max_retries = max_retries
+        self.margin = margin
+        # floor and ceiling for the adaptive poll interval
+        self.min_interval = min_interval or default_interval
+        self.max_interval = max(max_interval or default_interval, self.min_interval)
+        self.stride = 1 # records per poll
+        self.active = True
+
+        self.last_timestamp: datetime | None = None
+        # TimestampUtc of the record the next poll is scheduled for
+        self.expected_timestamp: datetime | None = None
+        self.next_poll: datetime | None = None
+        self.retries = 0
+        self._last_poll: datetime | None = None
+        self._probe_holdoff = 0
+        # recent upload cadences and lags (local arrival time - TimestampUtc)
+        self._cadences: deque[float] = deque(maxlen=5)
+        self._lags: deque[float] = deque(maxlen=10)
+
+    @property
+    def cadence(self) -> timedelta:
+        """The learned interval between records."""
+        if not self._cadences:
+            return self.default_interval
+        return timedelta(seconds=median(self._cadences))
+
+    @property
+    def lag(self) -> timedelta:
+        """The learned delay between a record's timestamp and it becoming available."""
+        # the smallest lag seen is the best estimate of when a record is first available
+        return timedelta(seconds=min(self._lags)) if self._lags else timedelta(0)
+
+    @property
+    def current_interval(self) -> timedelta:
+        """The adaptive interval between polls."""
+        return self.cadence * self.stride
+
+    def _update_stride(self, active: bool) -> None:
+        """Poll every record while active, doubling the stride while idle."""
+        cadence = self.cadence.total_seconds()
+        min_stride = max(ceil(self.min_interval.total_seconds() / cadence), 1)
+        max_stride = max(floor(self.max_interval.total_seconds() / cadence), min_stride)
+        self.active = active
+        self.stride = min_stride if active else min(max(self.stride * 2, min_stride), max_stride)
+
+    def is_due(self, now: datetime, tolerance: timedelta = timedelta(seconds=1)) -> bool:
+        """Return True if a poll is due."""
+        return self.next_poll is None or self.next_poll <= now + tolerance
+
+    def record(self, timestamp: datetime | None, now: datetime, active: bool = True) -> bool:
+        """Record a poll result and schedule the next poll; returns True for a new record.
+
+        active says whether the new record shows site activity (ignored if it is not new).
+        """
+        last_poll, self._last_poll = self._last_poll, now
+        if timestamp is None:
+            # no timestamp to lock onto (e.g. private API), poll at the adaptive interval
+            self._update_stride(active)
+            self.next_poll = now + self.current_interval
+            return True
+
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            # snapshot has not advanced yet, retry briefly before waiting for the next record
+            self._retry(now)
+            return False
+
+        if self.expected_timestamp is not None and timestamp < self.expected_timestamp - self.cadence / 2:
+            # skipping records (idle), the poll was too early and got the record before the one
+            # it was scheduled for: keep the newer data, but the phase and lag stay as they are
+            self.last_timestamp = timestamp
+            self._retry(now)
+            return True
+
+        cadence = None if self.last_timestamp is None else (timestamp - self.last_timestamp).total_seconds()
+        # ignore gaps (missed uploads) and bursts when learning the cadence
+        if cadence is not None and 0.5 <= cadence / self.default_interval.total_seconds() <= 1.5:
+            self._cadences.append(cadence)
+        if self.retries and last_poll is not None:
+            # the record was not there at the previous poll, so any shorter lag is out of date
+            too_short = (last_poll - timestamp).total_seconds()
+            self._lags = deque((lag for lag in self._lags if lag > too_short), maxlen=self._lags.maxlen)
+            self._lags.append(max((now - timestamp).total_seconds(), 0))
+            self._probe_holdoff = self.PROBE_HOLDOFF
+        else:
+            # the record was already there, so it may have been available earlier: every so
+            # often probe a little earlier, otherwise hold the current phase
+            early = self.margin if self._probe_holdoff else 2 * self.margin
+            self._probe_holdoff = max(self._probe_holdoff - 1, 0)
+            self._lags.append(max((now - timestamp - early).total_seconds(), 0))
+
+        self.last_timestamp = timestamp
+        self.retries = 0
+        self._update_stride(active)
+        self.next_poll = self._next_record_due(now)
+        return True
+
+    def _retry(self, now: datetime) -> None:
+        """Poll again briefly for the wanted record, then wait for the next one."""
+        self.retries += 1
+        if self.retries <= self.max_retries:
+            self.next_poll = now + self.retry_interval
+        else:
+            self.next_poll = now + self.cadence
+
+    def failed(self, now: datetime) -> None:
+        """Record a failed poll, trying again after the default interval."""
+        self._last_poll = now
+        # whichever record the retry gets is taken as it comes
+        self.expected_timestamp = None
+        self.next_poll = now + self.default_interval
+
+    def _next_record_due(self, now: datetime) -> datetime:
+        """Return the time just after the next wanted record should be available."""
+        expected = self.last_timestamp + self.current_interval
+        # if we've fallen behind (e.g. a slow request), catch up at the next upload
+        while expected + self.lag + self.margin <= now:
+            expected += self.cadence
+        self.expected_timestamp = expected
+        return expected + self.lag + self.margin
+
+    def interval(self, now: datetime) -> timedelta:
+        """Return the delay until the next poll."""
+        if self.next_poll is None:
+            return self.default_interval
+        return max(self.next_poll - now, timedelta(seconds=1))
@@ -1,682 +1,466 @@
 """Redback sensors for the Redback integration."""
 from __future__ import annotations
 
-from datetime import (datetime, timedelta)
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
 from homeassistant.core import (
     HomeAssistant,
     callback,
 )
 from homeassistant.config_entries import ConfigEntry
 
-import re
-
-# from homeassistant.exceptions import ConfigEntryAuthFailed
-# from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-
-# , UpdateFailed
-
 from homeassistant.const import (
+    UnitOfApparentPower,
     UnitOfElectricCurrent,
     UnitOfElectricPotential,
     UnitOfEnergy,
     UnitOfPower,
+    UnitOfReactivePower,
     UnitOfFrequency,
     UnitOfTemperature,
     PERCENTAGE,
+    EntityCategory,
 )
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.components.sensor import (
     SensorEntity,
+    SensorEntityDescription,
     SensorDeviceClass,
     SensorStateClass,
 )
 
-from .const import DOMAIN, LOGGER
-from .entity import RedbackEntity
-
-
-async def async_setup_entry(
-    hass: HomeAssistant,
-    entry: ConfigEntry,
-    async_add_entities: AddEntitiesCallback,
-) -> None:
-    """Setup entities"""
-
-    coordinator = hass.data[DOMAIN][entry.entry_id]
-    privateAPI = coordinator.redback.isPrivateAPI()
-    hasBattery = await coordinator.redback.hasBattery()
-    hasPVs = "PV_0_VoltageV" in coordinator.energy_data
-
-    # Private API has different entities
-    # Note: private API always creates battery entities, need examples without
-    # battery so the hasBattery() method can be updated to suit
-    if privateAPI:
-        entities = [
-            RedbackChargeSensor(
-                coordinator,
-                {
-                    "name": "Battery SoC",
-                    "id_suffix": "battery_soc",
-                    "data_source": "BatterySoC0to100",
-                },
-            ),
-            RedbackPowerSensor(
-                coordinator,
-                {
-                    "name": "Load Power",
-                    "id_suffix": "load_power",
-                    "data_source": "ACLoadW",
-                    "convertkW": True,
-                },
-            ),
-            RedbackPowerSensor(
-                coordinator,
-                {
-                    "name": "Backup Load Power",
-                    "id_suffix": "backup_load_power",
-                    "data_source": "BackupLoadW",
-                    "convertkW": True,
-                },
-            ),
-            RedbackPowerSensor(
-                coordinator,
-                {
-                    "name": "Solar Power",
-                    "id_suffix": "solar_power",
-                    "data_source": "PVW",
-                    "convertkW": True,
-                },
-            ),
-            RedbackPowerSensor(
-                coordinator,
-                {
-                    "name": "Battery Power",
-                    "id_suffix": "battery_power",
-                    "data_source": "BatteryNegativeIsChargingW",
-                    "convertkW": True,
-                },
-            ),
-            RedbackPowerSensor(
-                coordinator,
-                {
-                    "name": "Grid Power",
-                    "id_suffix": "grid_power",
-                    "data_source": "GridNegativeIsImportW",
-                    "convertkW": True,
-                },
-            ),
-            RedbackEnergySensor(
-                coordinator,
-                {
-                    "name": "Grid Export",
-                    "id_suffix": "grid_export",
-                    "data_source": "GridNegativeIsImportW",
-                    "direction": "positive",
-                    "convertkW": True,
-                },
-            ),
-            RedbackEnergySensor(
-                coordinator,
-                {
-                    "name": "Grid Import",
-                    "id_suffix": "grid_import",
-                    "data_source": "GridNegativeIsImportW",
-                    "direction": "negative",
-                    "convertkW": True,
-                },
-            ),
-            RedbackEnergySensor(
-                coordinator,
-                {
-                    "name": "Solar Generation",
-                    "id_suffix": "solar_gen",
-                    "data_source": "PVW",
-                    "direction": "positive",
-                    "convertkW": True,
-                },
-            ),
-            RedbackEnergySensor(
-                coordinator,
-                {
-                    "name": "Battery Charge",
-                    "id_suffix": "battery_charge_total",
-                    "data_source": "BatteryNegativeIsChargingW",
-                    "direction": "negative",
-                    "convertkW": True,
-                },
-            ),
-            RedbackEnergySensor(
-                coordinator,
-                {
-                    "name": "Battery Discharge",
-                    "id_suffix": "battery_discharge_total",
-                    "data_source": "BatteryNegativeIsChargingW",
-                    "direction": "positive",
-                    "convertkW": True,
-                },
-            ),
-            RedbackEnergySensor(
-                coordinator,
-                {
-                    "name": "Load Energy",
-                    "id_suffix": "load_energy",
-                    "data_source": "ACLoadW",
-                    "direction": "positive",
-                    "convertkW": True,
-                },
-            ),
-            RedbackEnergySensor(
-                coordinator,
-                {
-                    "name": "Backup Load Energy",
-                    "id_suffix": "backup_load_energy",
-                    "data_source": "BackupLoadW",
-                    "direction": "positive",
-                    "convertkW": True,
-                },
-            ),
-        ]
-
-    # Public API has different entities
+from .const import DOMAIN, LOGGER, TIER_SLOW
+from .coordinator import RedbackDataUpdateCoordinator
+from .entity import RedbackEntity, RedbackEntityDescription
+from .expression import CompiledExpression, compile_calc, is_calc
+from .redbacklib import parseTimestamp
+from .window import WINDOWS
+
+
+@dataclass(frozen=True, kw_only=True)
+class RedbackSensorEntityDescription(RedbackEntityDescription, SensorEntityDescription):
+    """Describes a Redback sensor"""
+
+    # reads the sensor's value, compiled once when the description is built
+    value_fn: Callable[[RedbackDataUpdateCoordinator], Any]
+    # calculated sensors: the parsed expression, its data keys are checked at setup
+    calc: CompiledExpression | None = None
+    # integrate the value (power, kW) over time into energy (kWh)
+    integrate: bool = False
+    # whether the value is available, beyond the coordinator having data (None = always)
+    available_fn: Callable[[RedbackDataUpdateCoordinator], bool] | None = None
+
+
+# value extractors, a key missing from the data (e.g. a PV or phase which has gone) reads as None
+
+def _reader(data_source: str) -> tuple[Callable[[Any], Any], CompiledExpression | None, frozenset[str]]:
+    """Return a reader of energy data for a data key or "$calc$" expression, the expression and its data keys."""
+    if is_calc(data_source):
+        calc = compile_calc(data_source)
+        # an expression which cannot be evaluated for a record reads as unknown (None)
+        return (lambda ed: None if (value := calc(ed)) is None else float(value)), calc, calc.keys
+    return (lambda ed: ed.get(data_source)), None, frozenset((data_source,))
+
+
+def _directional(read: Callable[[Any], Any], direction: str | None, convertkW: bool) -> Callable[[Any], Any]:
+    """Limit a reading to one direction (positive, or negative as a positive value), optionally from W to kW."""
+    if direction == "positive":
+        signed = lambda ed: None if (value := read(ed)) is None else max(value, 0)
+    elif direction == "negative":
+        signed = lambda ed: None if (value := read(ed)) is None else 0 - min(value, 0)
     else:
-        # basic entities which are common to every inverter
-        entities = [
-            RedbackStatusSensor(
-                coordinator,
-                {
-                    "name": "Status",
-                    "id_suffix": "status",
-                    "data_source": "Status",
-                },
-            ),
-            RedbackCurrentSensor(
-                coordinator,
-                {
-                    "name": "Grid Current A",
-                    "id_suffix": "grid_a_a",
-                    "data_source": "CurrentInstantaneousA_A",
-                },
-            ),
-            RedbackCurrentSensor(
-                coordinator,
-                {
-                    "name": "Grid Current B",
-                    "id_suffix": "grid_a_b",
-                    "data_source": "CurrentInstantaneousA_B",
-                },
-            ),
-            RedbackCurrentSensor(
-                coordinator,
-                {
-                    "name": "Grid Current C",
-                    "id_suffix": "grid_a_c",
-                    "data_source": "CurrentInstantaneousA_C",
-                },
-            ),
-            RedbackVoltageSensor(
-                coordinator,
-                {
-                    "name": "Grid Voltage A",
-                    "id_suffix": "grid_v_a",
-                    "data_source": "VoltageInstantaneousV_A",
-                },
-            ),
-            RedbackVoltageSensor(
-                coordinator,
-                {
-                    "name": "Grid Voltage B",
-                    "id_suffix": "grid_v_b",
-                    "data_source": "VoltageInstantaneousV_B",
-                },
-            ),
-            RedbackVoltageSensor(
-                coordinator,
-                {
-                    "name": "Grid Voltage C",
-                    "id_suffix": "grid_v_c",
-                    "data_source": "VoltageInstantaneousV_C",
-                },
-            ),
-            RedbackVoltageSensor(
-                coordinator,
-                {
-                    "name": "Grid Voltage",
-                    "id_suffix": "grid_v",
-                    "data_source": "VoltageInstantaneousV",
-                },
-            ),
-            RedbackTempSensor(
-                coordinator,
-                {
-                    "name": "Inverter Temperature",
-                    "id_suffix": "inverter_temp",
-                    "data_source": "InverterTemperatureC",
-                },
-            ),
-            RedbackFrequencySensor(
-                coordinator,
-                {
-                    "name": "Grid Frequency",
-                    "id_suffix": "grid_freq",
-                    "data_source": "FrequencyInstantaneousHz",
-                },
-            ),
-            RedbackEnergyMeter(
-                coordinator,
-                {
-                    "name": "Solar Generation Total",
-                    "id_suffix": "pv_total",
-                    "data_source": "PvAllTimeEnergykWh",
-                },
-            ),
-            RedbackEnergyMeter(
-                coordinator,
-                {
-                    "name": "Site Load Total",
-                    "id_suffix": "load_total",
-                    "data_source": "LoadAllTimeEnergykWh",
-                },
-            ),
-            RedbackEnergyMeter(
-                coordinator,
-                {
-                    "name": "Grid Export Total",
-                    "id_suffix": "export_total",
-                    "data_source": "ExportAllTimeEnergykWh",
-                },
-            ),
-            RedbackEnergyMeter(
-                coordinator,
-                {
-                    "name": "Grid Import Total",
-                    "id_suffix": "import_total",
-                    "data_source": "ImportAllTimeEnergykWh",
-                },
-            ),
-            RedbackPowerSensor(
-                coordinator,
-                {
-                    "name": "Grid Export",
-                    "id_suffix": "grid_export",
-                    "data_source": "ActiveExportedPowerInstantaneouskW",
-                },
-            ),
-            RedbackPowerSensor(
-                coordinator,
-                {
-                    "name": "Grid Import",
-                    "id_suffix": "grid_import",
-                    "data_source": "ActiveImportedPowerInstantaneouskW",
-                },
-            ),
-            RedbackPowerSensor(
-                coordinator,
-                {
-                    "name": "Solar Generation",
-                    "id_suffix": "pv_power",
-                    "data_source": "PvPowerInstantaneouskW",
-                },
-            ),
-            RedbackPowerSensor(
-                coordinator,
-                {
-                    "name": "Site Load",
-                    "id_suffix": "load_power",
-                    "data_source": "$calc$ float(ed['PvPowerInstantaneouskW']) + float(ed['BatteryPowerNegativeIsChargingkW'] if ed['BatteryPowerNegativeIsChargingkW'] else 0) - float(ed['ActiveExportedPowerInstantaneouskW']) + float(ed['ActiveImportedPowerInstantaneouskW'])",
-                },
-            ),
-        ]
-
-        # additional entities for inverters with PV strings
-        if hasPVs:
-            for i in range(10):
-                if f"PV_{i}_VoltageV" not in coordinator.energy_data: break
-                entities.extend([
-                    RedbackVoltageSensor(
-                        coordinator,
-                        {
-                            "name": f"PV {i} Voltage",
-                            "id_suffix": f"pv_{i}_v",
-                            "data_source": f"PV_{i}_VoltageV",
-                        },
-                    ),
-                    RedbackCurrentSensor(
-                        coordinator,
-                        {
-                            "name": f"PV {i} Current",
-                            "id_suffix": f"pv_{i}_a",
-                            "data_source": f"PV_{i}_CurrentA",
-                        },
-                    ),
-                    RedbackPowerSensor(
-                        coordinator,
-                        {
-                            "name": f"PV {i} Power",
-                            "id_suffix": f"pv_{i}_kW",
-                            "data_source": f"PV_{i}_PowerkW",
-                        },
-                    ),
-                ])
-
-        # additional entities for inverters with batteries
-        if hasBattery:
-            entities.extend([
-                RedbackChargeSensor(
-                    coordinator,
-                    {
-                        "name": "Battery SoC",
-                        "id_suffix": "battery_soc",
-                        "data_source": "BatterySoCInstantaneous0to1",
-                        "convertPercent": True,
-                    },
-                ),
-                RedbackPowerSensor(
-                    coordinator,
-                    {
-                        "name": "Battery Discharge",
-                        "id_suffix": "battery_discharge",
-                        "data_source": "BatteryPowerNegativeIsChargingkW",
-                        "direction": "positive",
-                    },
-                ),
-                RedbackPowerSensor(
-                    coordinator,
-                    {
-                        "name": "Battery Charge",
-                        "id_suffix": "battery_charge",
-                        "data_source": "BatteryPowerNegativeIsChargingkW",
-                        "direction": "negative",
-                    },
-                ),
-                RedbackEnergySensor(
-                    coordinator,
-                    {
-                        "name": "Battery Discharge Total",
-                        "id_suffix": "battery_discharge_total",
-                        "data_source": "BatteryPowerNegativeIsChargingkW",
-                        "direction": "positive",
-                    },
-                ),
-                RedbackEnergySensor(
-                    coordinator,
-                    {
-                        "name": "Battery Charge Total",
-                        "id_suffix": "battery_charge_total",
-                        "data_source": "BatteryPowerNegativeIsChargingkW",
-                        "direction": "negative",
-                    },
-                ),
-                RedbackEnergyStorageSensor(
-                    coordinator,
-                    {
-                        "name": "Battery Capacity",
-                        "id_suffix": "battery_capacity",
-                        "data_source": "BatteryCapacitykWh",
-                    },
-                ),
-                RedbackEnergyStorageSensor(
-                    coordinator,
-                    {
-                        "name": "Usable Battery Capacity",
-                        "id_suffix": "battery_usable_capacity",
-                        "data_source": "UsableBatteryCapacitykWh",
-                    },
-                ),
-                RedbackVoltageSensor(
-                    coordinator,
-                    {
-                        "name": "Battery Voltage",
-                        "id_suffix": "battery_v",
-                        "data_source": "BatteryVoltageV",
-                    },
-                ),
-                RedbackCurrentSensor(
-                    coordinator,
-                    {
-                        "name": "Battery Current",
-                        "id_suffix": "battery_a",
-                        "data_source": "BatteryCurrentNegativeIsChargingA",
-                    },
-                ),
-            ])
-
-    async_add_entities(entities)
+        signed = read
+    if convertkW:
+        return lambda ed: None if (value := signed(ed)) is None else value / 1000 # convert from W to kW
+    return signed
 
 
-class RedbackStatusSensor(RedbackEntity, SensorEntity):
-    """Sensor for battery state-of-charge"""
+# description builders, one per kind of sensor
 
-    _attr_name = "Status"
-    _attr_device_class = SensorDeviceClass.ENUM
-    _attr_options = ["OK", "OFFLINE", "FAULT"]
+def _status(key: str, name: str, data_source: str) -> RedbackSensorEntityDescription:
+    return RedbackSensorEntityDescription(
+        key=key,
+        name=name,
+        device_class=SensorDeviceClass.ENUM,
+        options=["OK", "OFFLINE", "FAULT"],
+        data_keys=frozenset((data_source,)),
+        value_fn=lambda coordinator: None if (status := coordinator.energy_data.get(data_source)) is None else status.upper(),
+    )
 
-    @property
-    def unique_id(self) -> str:
-        """Device Uniqueid."""
-        return f"{self.base_unique_id}_{self.id_suffix}"
 
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        LOGGER.debug("Updating entity: %s", self.unique_id)
-        self._attr_native_value = self.coordinator.energy_data[self.data_source].upper()
-        self.async_write_ha_state()
+def _charge(key: str, name: str, data_source: str, convertPercent: bool = False) -> RedbackSensorEntityDescription:
+    if convertPercent:
+        value_fn = lambda coordinator: None if (charge := coordinator.energy_data.get(data_source)) is None else charge * 100
+    else:
+        value_fn = lambda coordinator: coordinator.energy_data.get(data_source)
+    return RedbackSensorEntityDescription(
+        key=key,
+        name=name,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=PERCENTAGE,
+        device_class=SensorDeviceClass.BATTERY,
+        data_keys=frozenset((data_source,)),
+        value_fn=value_fn,
+    )
+
+
+def _measurement(
+    key: str,
+    name: str,
+    data_source: str,
+    unit: str | None,
+    device_class: SensorDeviceClass | None,
+    default: Any = None,
+    **kwargs: Any,
+) -> RedbackSensorEntityDescription:
+    return RedbackSensorEntityDescription(
+        key=key,
+        name=name,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=unit,
+        device_class=device_class,
+        data_keys=frozenset((data_source,)),
+        value_fn=lambda coordinator: coordinator.energy_data.get(data_source, default),
+        **kwargs,
+    )
+
+
+def _voltage(key: str, name: str, data_source: str) -> RedbackSensorEntityDescription:
+    return _measurement(key, name, data_source, UnitOfElectricPotential.VOLT, SensorDeviceClass.VOLTAGE, default=0)
+
+
+def _current(key: str, name: str, data_source: str) -> RedbackSensorEntityDescription:
+    return _measurement(key, name, data_source, UnitOfElectricCurrent.AMPERE, SensorDeviceClass.CURRENT, default=0)
+
+
+def _power(
+    key: str, name: str, data_source: str, direction: str | None = None, convertkW: bool = False
+) -> RedbackSensorEntityDescription:
+    read, calc, data_keys = _reader(data_source)
+    value = _directional(read, direction, convertkW)
+    return RedbackSensorEntityDescription(
+        key=key,
+        name=name,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfPower.KILO_WATT,
+        device_class=SensorDeviceClass.POWER,
+        calc=calc,
+        data_keys=data_keys,
+        value_fn=lambda coordinator: value(coordinator.energy_data),
+    )
+
+
+def _energy(
+    key: str, name: str, data_source: str, direction: str, convertkW: bool = False
+) -> RedbackSensorEntityDescription:
+    """Energy integrated from a power reading, so it needs every update (not just changed data)."""
+    value = _directional(lambda ed: ed.get(data_source), direction, convertkW)
+    return RedbackSensorEntityDescription(
+        key=key,
+        name=name,
+        state_class=SensorStateClass.TOTAL,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        device_class=SensorDeviceClass.ENERGY,
+        integrate=True,
+        value_fn=lambda coordinator: value(coordinator.energy_data),
+    )
+
+
+def _meter(key: str, name: str, data_source: str) -> RedbackSensorEntityDescription:
+    """The cloud's all-time counters, rather than integrating power locally."""
+    return RedbackSensorEntityDescription(
+        key=key,
+        name=name,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        device_class=SensorDeviceClass.ENERGY,
+        data_keys=frozenset((data_source,)),
+        value_fn=lambda coordinator: coordinator.energy_data.get(data_source),
+    )
+
+
+def _storage(key: str, name: str, data_source: str) -> RedbackSensorEntityDescription:
+    """Energy storage, always drawn from inverter_info, not energy_data."""
+    return RedbackSensorEntityDescription(
+        key=key,
+        name=name,
+        state_class=SensorStateClass.TOTAL,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        # this class not availabe until 2023.4 # device_class=SensorDeviceClass.ENERGY_STORAGE
+        device_class=SensorDeviceClass.ENERGY,
+        data_keys=frozenset((data_source,)),
+        value_fn=lambda coordinator: coordinator.inverter_info.get(data_source),
+    )
+
+
+def _phase(
+    key: str, name: str, data_source: str, unit: str | None, device_class: SensorDeviceClass | None, precision: int
+) -> RedbackSensorEntityDescription:
+    """Per-phase analytics (disabled by default), worked out from the cloud's Phases array when read."""
+    return RedbackSensorEntityDescription(
+        key=key,
+        name=name,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=unit,
+        device_class=device_class,
+        suggested_display_precision=precision,
+        entity_registry_enabled_default=False,
+        # not among the snapshot's data keys, so updated with every new record
+        value_fn=lambda coordinator: coordinator.energy_data.analytics.get(data_source),
+    )
+
+
+def _rolling(series: str, seriesName: str, window: str, statistic: str, statisticName: str) -> RedbackSensorEntityDescription:
+    """Rolling power statistics (disabled by default), the coordinator keeps the windows."""
+    return RedbackSensorEntityDescription(
+        key=f"{series}_power_{window}_{statistic}",
+        name=f"{seriesName} Power {window} {statisticName}",
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfPower.KILO_WATT,
+        device_class=SensorDeviceClass.POWER,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.rolling.get(series, window, statistic),
+        # unavailable when no readings fall within the window (e.g. polls are failing)
+        available_fn=lambda coordinator: coordinator.rolling.count(series, window) > 0,
+    )
+
+
+# Private API has different entities
+# Note: private API always creates battery entities, need examples without
+# battery so the hasBattery() method can be updated to suit
+PRIVATE_SENSORS = (
+    _charge("battery_soc", "Battery SoC", "BatterySoC0to100"),
+    _power("load_power", "Load Power", "ACLoadW", convertkW=True),
+    _power("backup_load_power", "Backup Load Power", "BackupLoadW", convertkW=True),
+    _power("solar_power", "Solar Power", "PVW", convertkW=True),
+    _power("battery_power", "Battery Power", "BatteryNegativeIsChargingW", convertkW=True),
+    _power("grid_power", "Grid Power", "GridNegativeIsImportW", convertkW=True),
+    _energy("grid_export", "Grid Export", "GridNegativeIsImportW", "positive", convertkW=True),
+    _energy("grid_import", "Grid Import", "GridNegativeIsImportW", "negative", convertkW=True),
+    _energy("solar_gen", "Solar Generation", "PVW", "positive", convertkW=True),
+    _energy("battery_charge_total", "Battery Charge", "BatteryNegativeIsChargingW", "negative", convertkW=True),
+    _energy("battery_discharge_total", "Battery Discharge", "BatteryNegativeIsChargingW", "positive", convertkW=True),
+    _energy("load_energy", "Load Energy", "ACLoadW", "positive", convertkW=True),
+    _energy("backup_load_energy", "Backup Load Energy", "BackupLoadW", "positive", convertkW=True),
+)
 
-class RedbackChargeSensor(RedbackEntity, SensorEntity):
-    """Sensor for battery state-of-charge"""
+# Public API: basic entities which are common to every inverter
+PUBLIC_SENSORS = (
+    _status("status", "Status", "Status"),
+    _current("grid_a_a", "Grid Current A", "CurrentInstantaneousA_A"),
+    _current("grid_a_b", "Grid Current B", "CurrentInstantaneousA_B"),
+    _current("grid_a_c", "Grid Current C", "CurrentInstantaneousA_C"),
+    _voltage("grid_v_a", "Grid Voltage A", "VoltageInstantaneousV_A"),
+    _voltage("grid_v_b", "Grid Voltage B", "VoltageInstantaneousV_B"),
+    _voltage("grid_v_c", "Grid Voltage C", "VoltageInstantaneousV_C"),
+    _voltage("grid_v", "Grid Voltage", "VoltageInstantaneousV"),
+    _measurement("inverter_temp", "Inverter Temperature", "InverterTemperatureC", UnitOfTemperature.CELSIUS, SensorDeviceClass.TEMPERATURE, tier=TIER_SLOW),
+    _measurement("grid_freq", "Grid Frequency", "FrequencyInstantaneousHz", UnitOfFrequency.HERTZ, SensorDeviceClass.FREQUENCY, tier=TIER_SLOW),
+    _meter("pv_total", "Solar Generation Total", "PvAllTimeEnergykWh"),
+    _meter("load_total", "Site Load Total", "LoadAllTimeEnergykWh"),
+    _meter("export_total", "Grid Export Total", "ExportAllTimeEnergykWh"),
+    _meter("import_total", "Grid Import Total", "ImportAllTimeEnergykWh"),
+    _power("grid_export", "Grid Export", "ActiveExportedPowerInstantaneouskW"),
+    _power("grid_import", "Grid Import", "ActiveImportedPowerInstantaneouskW"),
+    _power("pv_power", "Solar Generation", "PvPowerInstantaneouskW"),
+    _power("load_power", "Site Load", "$calc$ float(ed['PvPowerInstantaneouskW']) + float(ed['BatteryPowerNegativeIsChargingkW'] if ed['BatteryPowerNegativeIsChargingkW'] else 0) - float(ed['ActiveExportedPowerInstantaneouskW']) + float(ed['ActiveImportedPowerInstantaneouskW'])"),
+)
 
-    _attr_name = "Battery SoC"
-    _attr_state_class = SensorStateClass.MEASUREMENT
-    _attr_native_unit_of_measurement = PERCENTAGE
-    _attr_device_class = SensorDeviceClass.BATTERY
+# Public API: additional entities for inverters with batteries
+PUBLIC_BATTERY_SENSORS = (
+    _charge("battery_soc", "Battery SoC", "BatterySoCInstantaneous0to1", convertPercent=True),
+    _power("battery_discharge", "Battery Discharge", "BatteryPowerNegativeIsChargingkW", "positive"),
+    _power("battery_charge", "Battery Charge", "BatteryPowerNegativeIsChargingkW", "negative"),
+    # integrated locally, as these have always been; switching them to the cloud's counters
+    # would book the whole lifetime total as one hour of energy in their statistics
+    _energy("battery_discharge_total", "Battery Discharge Total", "BatteryPowerNegativeIsChargingkW", "positive"),
+    _energy("battery_charge_total", "Battery Charge Total", "BatteryPowerNegativeIsChargingkW", "negative"),
+    # the cloud's all-time counters, as new entities
+    _meter("battery_discharge_lifetime", "Battery Discharge Lifetime", "BatteryDischargeAllTimeEnergykWh"),
+    _meter("battery_charge_lifetime", "Battery Charge Lifetime", "BatteryChargeAllTimeEnergykWh"),
+    _storage("battery_capacity", "Battery Capacity", "BatteryCapacitykWh"),
+    _storage("battery_usable_capacity", "Usable Battery Capacity", "UsableBatteryCapacitykWh"),
+    _voltage("battery_v", "Battery Voltage", "BatteryVoltageV"),
+    _current("battery_a", "Battery Current", "BatteryCurrentNegativeIsChargingA"),
+)
 
-    @property
-    def unique_id(self) -> str:
-        """Device Uniqueid."""
-        return f"{self.base_unique_id}_{self.id_suffix}"
+# diagnostic: when the last good data arrived, and whether it is being served stale
+LAST_DATA_SENSOR = RedbackSensorEntityDescription(
+    key="last_data",
+    name="Last Data",
+    device_class=SensorDeviceClass.TIMESTAMP,
+    entity_category=EntityCategory.DIAGNOSTIC,
+    value_fn=lambda coordinator: coordinator.last_success,
+)
 
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        LOGGER.debug("Updating entity: %s", self.unique_id)
-        self._attr_native_value = self.coordinator.energy_data[self.data_source]
-        if self.convertPercent: self._attr_native_value *= 100
-        self.async_write_ha_state()
+ROLLING_STATISTICS = (("mean", "Average"), ("maximum", "Peak"), ("minimum", "Minimum"))
 
-class RedbackTempSensor(RedbackEntity, SensorEntity):
-    """Sensor for temperature"""
 
-    _attr_name = "Temperature"
-    _attr_state_class = SensorStateClass.MEASUREMENT
-    _attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
-    _attr_device_class = SensorDeviceClass.TEMPERATURE
+def _pv_sensors(i: int) -> tuple[RedbackSensorEntityDescription, ...]:
+    """Additional entities for inverters with PV strings."""
+    return (
+        _voltage(f"pv_{i}_v", f"PV {i} Voltage", f"PV_{i}_VoltageV"),
+        _current(f"pv_{i}_a", f"PV {i} Current", f"PV_{i}_CurrentA"),
+        _power(f"pv_{i}_kW", f"PV {i} Power", f"PV_{i}_PowerkW"),
+    )
 
-    @property
-    def unique_id(self) -> str:
-        """Device Uniqueid."""
-        return f"{self.base_unique_id}_{self.id_suffix}"
 
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        LOGGER.debug("Updating entity: %s", self.unique_id)
-        self._attr_native_value = self.coordinator.energy_data[self.data_source]
-        self.async_write_ha_state()
+def _phase_sensors(phase: str) -> tuple[RedbackSensorEntityDescription, ...]:
+    """Per-phase analytics for a grid phase."""
+    suffix = phase.lower()
+    return (
+        _phase(f"grid_kw_{suffix}", f"Grid Power {phase}", f"ActivePowerkW_{phase}", UnitOfPower.KILO_WATT, SensorDeviceClass.POWER, 3),
+        _phase(f"grid_va_{suffix}", f"Grid Apparent Power {phase}", f"ApparentPowerVA_{phase}", UnitOfApparentPower.VOLT_AMPERE, SensorDeviceClass.APPARENT_POWER, 0),
+        _phase(f"grid_var_{suffix}", f"Grid Reactive Power {phase}", f"ReactivePowervar_{phase}", UnitOfReactivePower.VOLT_AMPERE_REACTIVE, SensorDeviceClass.REACTIVE_POWER, 0),
+        _phase(f"grid_pf_{suffix}", f"Grid Power Factor {phase}", f"PowerFactor_{phase}", None, SensorDeviceClass.POWER_FACTOR, 3),
+    )
 
-class RedbackFrequencySensor(RedbackEntity, SensorEntity):
-    """Sensor for frequency"""
 
-    _attr_name = "Frequency"
-    _attr_state_class = SensorStateClass.MEASUREMENT
-    _attr_native_unit_of_measurement = UnitOfFrequency.HERTZ
-    _attr_device_class = SensorDeviceClass.FREQUENCY
+@lru_cache(maxsize=None)
+def sensor_descriptions(
+    privateAPI: bool, pvCount: int, hasBattery: bool, phases: tuple[str, ...]
+) -> tuple[RedbackSensorEntityDescription, ...]:
+    """Return the sensors for a capability profile, built once and shared by every site with that profile."""
+    if privateAPI:
+        descriptions = list(PRIVATE_SENSORS)
+    else:
+        descriptions = list(PUBLIC_SENSORS)
+        for i in range(pvCount):
+            descriptions.extend(_pv_sensors(i))
+        for phase in phases:
+            descriptions.extend(_phase_sensors(phase))
+        if phases:
+            descriptions.append(
+                _phase("grid_a_n", "Grid Neutral Current", "NeutralCurrentA", UnitOfElectricCurrent.AMPERE, SensorDeviceClass.CURRENT, 2)
+            )
+        if len(phases) > 1:
+            descriptions.append(
+                _phase("grid_imbalance", "Grid Phase Imbalance", "PhaseImbalancePercent", PERCENTAGE, None, 1)
+            )
+        if hasBattery:
+            descriptions.extend(PUBLIC_BATTERY_SENSORS)
 
-    @property
-    def unique_id(self) -> str:
-        """Device Uniqueid."""
-        return f"{self.base_unique_id}_{self.id_suffix}"
+    descriptions.append(LAST_DATA_SENSOR)
 
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        LOGGER.debug("Updating entity: %s", self.unique_id)
-        self._attr_native_value = self.coordinator.energy_data[self.data_source]
-        self.async_write_ha_state()
+    # rolling average, peak and minimum power (disabled by default)
+    rollingSeries = {"pv": "PV", "load": "Load", "grid": "Grid"}
+    if hasBattery:
+        rollingSeries["battery"] = "Battery"
+    for series, seriesName in rollingSeries.items():
+        for window in WINDOWS:
+            for statistic, statisticName in ROLLING_STATISTICS:
+                descriptions.append(_rolling(series, seriesName, window, statistic, statisticName))
 
-class RedbackCurrentSensor(RedbackEntity, SensorEntity):
-    """Sensor for current"""
+    return tuple(descriptions)
 
-    _attr_name = "Current"
-    _attr_state_class = SensorStateClass.MEASUREMENT
-    _attr_native_unit_of_measurement = UnitOfElectricCurrent.AMPERE
-    _attr_device_class = SensorDeviceClass.CURRENT
 
-    @property
-    def unique_id(self) -> str:
-        """Device Uniqueid."""
-        return f"{self.base_unique_id}_{self.id_suffix}"
-
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        LOGGER.debug("Updating entity: %s", self.unique_id)
-        self._attr_native_value = self.coordinator.energy_data.get(self.data_source, 0)
-        self.async_write_ha_state()
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Setup entities"""
 
-class RedbackVoltageSensor(RedbackEntity, SensorEntity):
-    """Sensor for voltage"""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    privateAPI = coordinator.redback.isPrivateAPI()
+    # energy integrated from power readings is kept across restarts
+    await coordinator.energy_store.async_load()
+    # the layout is restored from storage at startup, so no data may have been fetched yet
+    layout = coordinator.layout
+    descriptions = sensor_descriptions(
+        privateAPI, layout["pv_count"], layout["has_battery"], tuple(layout.get("phases", ()))
+    )
+
+    entities = []
+    for description in descriptions:
+        if description is LAST_DATA_SENSOR:
+            entities.append(RedbackLastDataSensor(coordinator, description))
+        elif description.integrate:
+            entities.append(RedbackEnergySensor(coordinator, description))
+        else:
+            entities.append(RedbackSensor(coordinator, description))
 
-    _attr_name = "Voltage"
-    _attr_state_class = SensorStateClass.MEASUREMENT
-    _attr_native_unit_of_measurement = UnitOfElectricPotential.VOLT
-    _attr_device_class = SensorDeviceClass.VOLTAGE
+    async_add_entities(entities)
 
-    @property
-    def unique_id(self) -> str:
-        """Device Uniqueid."""
-        return f"{self.base_unique_id}_{self.id_suffix}"
 
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        LOGGER.debug("Updating entity: %s", self.unique_id)
-        self._attr_native_value = self.coordinator.energy_data.get(self.data_source, 0)
-        self.async_write_ha_state()
+class RedbackSensor(RedbackEntity, SensorEntity):
+    """Sensor for a value described by a RedbackSensorEntityDescription"""
 
-class RedbackPowerSensor(RedbackEntity, SensorEntity):
-    """Sensor for power"""
+    entity_description: RedbackSensorEntityDescription
 
-    _attr_name = "Power"
-    _attr_state_class = SensorStateClass.MEASUREMENT
-    _attr_native_unit_of_measurement = UnitOfPower.KILO_WATT
-    _attr_device_class = SensorDeviceClass.POWER
+    def __init__(self, coordinator: RedbackDataUpdateCoordinator, description: RedbackSensorEntityDescription) -> None:
+        super().__init__(coordinator, description)
+        # calculated measurements are parsed with their description, their data keys are
+        # checked against the first data (at startup, entities may be set up before any arrives)
+        self._check_keys = description.calc is not None
 
     @property
-    def unique_id(self) -> str:
-        """Device Uniqueid."""
-        return f"{self.base_unique_id}_{self.id_suffix}"
+    def available(self) -> bool:
+        """Sensors may be unavailable on their own (see available_fn)."""
+        available_fn = self.entity_description.available_fn
+        return super().available and (available_fn is None or available_fn(self.coordinator))
 
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        LOGGER.debug("Updating entity: %s", self.unique_id)
+    async def async_added_to_hass(self) -> None:
+        """Start from the data already fetched; the coordinator only updates entities whose data keys change."""
+        await super().async_added_to_hass()
+        if self.coordinator.energy_data is not None:
+            self._async_update_value()
 
-        measurement = 0
-        # dynamically calculated power measurement
-        if self.data_source.startswith('$calc$'):
-            measurement = re.sub(r'^\$calc\$\s*', '', self.data_source)
-            ed = self.coordinator.energy_data
-            measurement = float(eval(measurement, {'ed':ed}))
-
-        # direct power measurement
-        else:
-            measurement = self.coordinator.energy_data[self.data_source]
-
-        if (self.direction == "positive"):
-            measurement = max(measurement, 0)
-        elif (self.direction == "negative"):
-            measurement = 0 - min(measurement, 0)
-        self._attr_native_value = measurement
-        if self.convertkW: self._attr_native_value /= 1000 # convert from W to kW
-        self.async_write_ha_state()
-
-class RedbackEnergySensor(RedbackEntity, SensorEntity):
-    """Sensor for energy"""
-
-    _attr_name = "Energy"
-    _attr_state_class = SensorStateClass.TOTAL
-    _attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
-    _attr_device_class = SensorDeviceClass.ENERGY
-
-    def __init__(self, coordinator: RedbackDataUpdateCoordinator, details) -> None:        
-        super().__init__(coordinator, details)
-        self._attr_native_value = 0
-        self._attr_last_reset = datetime.now()
-        self._last_update = datetime.now()
-        
-
-    @property
-    def unique_id(self) -> str:
-        """Device Uniqueid."""
-        return f"{self.base_unique_id}_{self.id_suffix}"
+    @callback
+    def _async_update_value(self) -> None:
+        """Read the sensor's value from the coordinator."""
+        if self._check_keys:
+            self._check_keys = False
+            if unknown := self.entity_description.calc.unknown_keys(self.coordinator.energy_data):
+                LOGGER.error(
+                    "Calculated sensor %s refers to unknown data keys: %s",
+                    self.entity_description.name, ", ".join(sorted(unknown))
+                )
+        self._attr_native_value = self.entity_description.value_fn(self.coordinator)
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
         LOGGER.debug("Updating entity: %s", self.unique_id)
-        measurement = self.coordinator.energy_data[self.data_source]
-        if(self.direction == "positive"):
-            measurement = max(measurement, 0)
-        else:
-            measurement = 0 - min(measurement, 0)
-        sample_time = datetime.now()
-        time_delta = sample_time - self._last_update    # Assume sample value is representative of the time since last update
-        self._last_update = sample_time
-        hours = time_delta.total_seconds()/3600
-        measurement = measurement * hours  # multiply watts by hours to get Wh        
-        if self.convertkW: self.measurement /= 1000 # convert from Wh to kWh
-        self._attr_native_value += measurement 
+        # entities set up from stored metadata have no data until the first update
+        if self.coordinator.energy_data is not None:
+            self._async_update_value()
         self.async_write_ha_state()
 
-class RedbackEnergyMeter(RedbackEntity, SensorEntity):
-    """Sensor for energy metering"""
+class RedbackEnergySensor(RedbackSensor):
+    """Sensor for energy integrated from power"""
 
-    _attr_name = "Energy Meter"
-    _attr_state_class = SensorStateClass.TOTAL_INCREASING
-    _attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
-    _attr_device_class = SensorDeviceClass.ENERGY
-
-    @property
-    def unique_id(self) -> str:
-        """Device Uniqueid."""
-        return f"{self.base_unique_id}_{self.id_suffix}"
+    def __init__(self, coordinator: RedbackDataUpdateCoordinator, description: RedbackSensorEntityDescription) -> None:
+        super().__init__(coordinator, description)
+        # accumulated energy is restored from storage, and carries on across restarts
+        self._integrator = coordinator.energy_store.integrator(description.key)
+        self._attr_native_value = self._integrator.total
+        self._attr_last_reset = self._integrator.last_reset
 
     @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        LOGGER.debug("Updating entity: %s", self.unique_id)
-        self._attr_native_value = self.coordinator.energy_data[self.data_source]
-        self.async_write_ha_state()
-
-class RedbackEnergyStorageSensor(RedbackEntity, SensorEntity):
-    """Sensor for energy storage"""
-
-    _attr_name = "Energy Storage"
-    _attr_state_class = SensorStateClass.TOTAL
-    _attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
-    # this class not availabe until 2023.4 # _attr_device_class = SensorDeviceClass.ENERGY_STORAGE 
-    _attr_device_class = SensorDeviceClass.ENERGY
+    def _async_update_value(self) -> None:
+        """Integrate the power reading into the energy total."""
+        measurement = self.entity_description.value_fn(self.coordinator)
+        # integrate over the sample's own timestamp (the private API has none, so use when it was fetched)
+        sample_time = parseTimestamp(self.coordinator.energy_data.get("TimestampUtc")) or self.coordinator.last_success
+        if measurement is not None and self._integrator.add(sample_time, measurement):
+            self.coordinator.energy_store.async_schedule_save()
+        self._attr_native_value = self._integrator.total
+
+class RedbackLastDataSensor(RedbackSensor):
+    """Diagnostic sensor for the last good data"""
 
     @property
-    def unique_id(self) -> str:
-        """Device Uniqueid."""
-        return f"{self.base_unique_id}_{self.id_suffix}"
-
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        LOGGER.debug("Updating entity: %s", self.unique_id)
-        # note: this sensor type always draws from inverter_info, not energy_data
-        self._attr_native_value = self.coordinator.inverter_info[self.data_source]
-        self.async_write_ha_state()
+    def available(self) -> bool:
+        """Stays available when the data is not, that is when it is most useful."""
+        return self.coordinator.last_success is not None
 
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Staleness of the data."""
+        return {
+            "stale": self.coordinator.stale,
+            "grace_period": self.coordinator.stale_grace.total_seconds(),
+        }
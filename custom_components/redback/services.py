@@ -0,0 +1,35 @@
+"""Services for the Redback integration."""
+from __future__ import annotations
+
+import asyncio
+
+import voluptuous as vol
+
+from homeassistant.const import ATTR_CONFIG_ENTRY_ID
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+
+from .const import DOMAIN, SERVICE_REFRESH
+from .coordinator import RedbackDataUpdateCoordinator
+
+REFRESH_SCHEMA = vol.Schema({vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string})
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the Redback services."""
+
+    async def async_refresh(call: ServiceCall) -> None:
+        """Refresh one Redback site now, or every site if no config entry is given."""
+        entry_id = call.data.get(ATTR_CONFIG_ENTRY_ID)
+        coordinators = [
+            coordinator
+            for key, coordinator in hass.data.get(DOMAIN, {}).items()
+            if isinstance(coordinator, RedbackDataUpdateCoordinator)
+            and entry_id in (None, key)
+        ]
+        if entry_id is not None and not coordinators:
+            raise ServiceValidationError(f"No loaded Redback config entry {entry_id}")
+        await asyncio.gather(*(coordinator.async_force_refresh() for coordinator in coordinators))
+
+    hass.services.async_register(DOMAIN, SERVICE_REFRESH, async_refresh, schema=REFRESH_SCHEMA)
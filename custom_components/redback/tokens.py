@@ -0,0 +1,106 @@
+"""Bearer token storage for the Redback integration.
+
+OAuth2 bearer tokens are saved with their expiry, so that a restart, reload or
+reauth check can reuse a still valid token instead of asking the Auth endpoint
+for a new one. Tokens are keyed by a hash of the client credentials and are
+obfuscated with a key derived from them, so the store on its own does not hold
+a usable token (this is obfuscation, not encryption: the credentials are in the
+config entry).
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, LOGGER, DATA_TOKENS, PERSIST_TOKENS, STORAGE_SAVE_DELAY, TOKEN_STORAGE_VERSION
+from .redbacklib import RedbackInverter, RedbackTokenManager
+
+
+def _credentials_hash(client_id: str, client_secret: str, purpose: bytes) -> bytes:
+    return hashlib.sha256(
+        purpose + b"\0" + client_id.encode() + b"\0" + client_secret.encode()
+    ).digest()
+
+
+def _keystream(key: bytes, length: int) -> bytes:
+    blocks = (
+        hashlib.sha256(key + counter.to_bytes(4, "big")).digest()
+        for counter in range(length // 32 + 1)
+    )
+    return b"".join(blocks)[:length]
+
+
+def _obfuscate(token: str, key: bytes) -> str:
+    data = token.encode()
+    return base64.b64encode(bytes(a ^ b for a, b in zip(data, _keystream(key, len(data))))).decode()
+
+
+def _deobfuscate(value: str, key: bytes) -> str:
+    data = base64.b64decode(value)
+    return bytes(a ^ b for a, b in zip(data, _keystream(key, len(data)))).decode()
+
+
+class RedbackTokenStore:
+    """Saved bearer tokens for every Redback account."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the token store."""
+        self._store: Store[dict] = Store(
+            hass, TOKEN_STORAGE_VERSION, f"{DOMAIN}.tokens", private=True
+        )
+        self._tokens: dict[str, dict] | None = None
+        self._load_lock = asyncio.Lock()
+
+    async def async_load(self) -> None:
+        """Load the saved tokens (once)."""
+        async with self._load_lock:
+            if self._tokens is None:
+                self._tokens = await self._store.async_load() or {}
+
+    @callback
+    def async_attach(
+        self, manager: RedbackTokenManager, client_id: str, client_secret: str
+    ) -> None:
+        """Restore a saved token into a token manager, and save the tokens it fetches from now on."""
+        account = _credentials_hash(client_id, client_secret, b"account").hex()
+        key = _credentials_hash(client_id, client_secret, b"token")
+
+        if (saved := self._tokens.get(account)) is not None:
+            try:
+                token = _deobfuscate(saved["token"], key)
+            except (KeyError, ValueError):
+                token = None
+            if token and manager.restoreToken(token, saved["expires_at"]):
+                LOGGER.debug("Reusing saved Redback bearer token")
+
+        @callback
+        def _async_on_token(token: str | None, expires_at: float | None) -> None:
+            if token is None:
+                # rejected (e.g. 401), never restore it again
+                self._tokens.pop(account, None)
+            else:
+                self._tokens[account] = {
+                    "token": _obfuscate(token, key),
+                    "expires_at": expires_at,
+                }
+            self._store.async_delay_save(lambda: self._tokens, STORAGE_SAVE_DELAY)
+
+        manager.onToken = _async_on_token
+
+
+async def async_attach_token_store(
+    hass: HomeAssistant, redback: RedbackInverter, client_id: str, client_secret: str
+) -> None:
+    """Persist a public API connection's bearer tokens across restarts (if enabled)."""
+    if not PERSIST_TOKENS or (manager := redback.getTokenManager()) is None:
+        return
+
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (store := domain_data.get(DATA_TOKENS)) is None:
+        store = domain_data[DATA_TOKENS] = RedbackTokenStore(hass)
+    await store.async_load()
+    store.async_attach(manager, client_id, client_secret)
@@ -0,0 +1,167 @@
+"""Rolling window statistics for the Redback integration.
+
+Recent power readings are kept per site in fixed-size ring buffers (array
+backed, so a site's windows take a few KB whatever its uptime), and rolling
+averages, minima and maxima are updated incrementally as each snapshot
+arrives instead of querying the recorder:
+
+- the sum for the average is updated as samples enter and leave the window
+- minimum and maximum use monotonic queues, amortised O(1) per sample
+
+Samples also expire on every poll, whether or not it brings a new one, so a
+window never reports readings from outside it.
+"""
+from __future__ import annotations
+
+from array import array
+from collections import deque
+from collections.abc import Callable, Mapping
+from typing import Any
+
+# window name: duration in seconds
+WINDOWS = {
+    "5m": 300,
+    "1h": 3600,
+}
+# samples at most this often (seconds) fit in a window's buffer, the cloud uploads once a minute
+MIN_SAMPLE_INTERVAL = 30
+
+
+def _kw(ed: Mapping[str, Any], key: str, scale: float = 1) -> float:
+    return (ed.get(key) or 0) * scale
+
+
+def _public(ed: Mapping[str, Any]) -> bool:
+    return "PvPowerInstantaneouskW" in ed
+
+
+# power series (kW) from a snapshot, public or private API
+SERIES: dict[str, Callable[[Mapping[str, Any]], float]] = {
+    "pv": lambda ed: _kw(ed, "PvPowerInstantaneouskW") if _public(ed) else _kw(ed, "PVW", 0.001),
+    "load": lambda ed: (
+        _kw(ed, "PvPowerInstantaneouskW")
+        + _kw(ed, "BatteryPowerNegativeIsChargingkW")
+        - _kw(ed, "ActiveExportedPowerInstantaneouskW")
+        + _kw(ed, "ActiveImportedPowerInstantaneouskW")
+    ) if _public(ed) else _kw(ed, "ACLoadW", 0.001),
+    # positive = importing from the grid
+    "grid": lambda ed: (
+        _kw(ed, "ActiveImportedPowerInstantaneouskW") - _kw(ed, "ActiveExportedPowerInstantaneouskW")
+    ) if _public(ed) else _kw(ed, "GridNegativeIsImportW", -0.001),
+    # positive = discharging
+    "battery": lambda ed: _kw(ed, "BatteryPowerNegativeIsChargingkW") if _public(ed) else _kw(ed, "BatteryNegativeIsChargingW", 0.001),
+}
+
+
+class RollingWindow:
+    """Rolling average, minimum and maximum of one series over a time window."""
+
+    __slots__ = ("duration", "capacity", "_times", "_values", "_count", "_seq", "_sum", "_min", "_max")
+
+    def __init__(self, duration: float, capacity: int) -> None:
+        """Initialize the window (duration in seconds, capacity in samples)."""
+        self.duration = duration
+        self.capacity = capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        self._count = 0 # samples in the window
+        self._seq = 0 # samples ever added, sample n is stored at index n % capacity
+        self._sum = 0.0
+        # sample numbers with increasing (minimum) and decreasing (maximum) values
+        self._min: deque[int] = deque()
+        self._max: deque[int] = deque()
+
+    def add(self, timestamp: float, value: float) -> bool:
+        """Add a sample (timestamp in seconds), returns False for a duplicate or out-of-order sample."""
+        if self._count and timestamp <= self._times[(self._seq - 1) % self.capacity]:
+            return False
+        if self._count == self.capacity:
+            self._evict()
+
+        seq = self._seq
+        index = seq % self.capacity
+        self._times[index] = timestamp
+        self._values[index] = value
+        self._seq += 1
+        self._count += 1
+
+        values = self._values
+        capacity = self.capacity
+        while self._min and values[self._min[-1] % capacity] >= value:
+            self._min.pop()
+        self._min.append(seq)
+        while self._max and values[self._max[-1] % capacity] <= value:
+            self._max.pop()
+        self._max.append(seq)
+
+        if seq % capacity == capacity - 1:
+            # recalculate now and then, so rounding errors in the running sum cannot build up
+            self._sum = sum(values[(seq - n) % capacity] for n in range(1, self._count)) + value
+        else:
+            self._sum += value
+
+        self.expire(timestamp)
+        return True
+
+    def expire(self, now: float) -> None:
+        """Drop samples which are older than the window."""
+        cutoff = now - self.duration
+        while self._count and self._times[(self._seq - self._count) % self.capacity] <= cutoff:
+            self._evict()
+
+    def _evict(self) -> None:
+        oldest = self._seq - self._count
+        self._sum -= self._values[oldest % self.capacity]
+        self._count -= 1
+        if self._min[0] == oldest:
+            self._min.popleft()
+        if self._max[0] == oldest:
+            self._max.popleft()
+        if not self._count:
+            self._sum = 0.0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def mean(self) -> float | None:
+        return self._sum / self._count if self._count else None
+
+    @property
+    def minimum(self) -> float | None:
+        return self._values[self._min[0] % self.capacity] if self._count else None
+
+    @property
+    def maximum(self) -> float | None:
+        return self._values[self._max[0] % self.capacity] if self._count else None
+
+
+class RedbackRollingStats:
+    """Rolling windows of every power series for one site."""
+
+    def __init__(self) -> None:
+        """Initialize the windows."""
+        self.windows: dict[tuple[str, str], RollingWindow] = {
+            (series, window): RollingWindow(duration, duration // MIN_SAMPLE_INTERVAL + 2)
+            for series in SERIES
+            for window, duration in WINDOWS.items()
+        }
+
+    def add(self, timestamp: float, ed: Mapping[str, Any]) -> None:
+        """Add a snapshot (timestamp in seconds)."""
+        values = {series: extract(ed) for series, extract in SERIES.items()}
+        for (series, _), window in self.windows.items():
+            window.add(timestamp, values[series])
+
+    def expire(self, now: float) -> None:
+        """Drop samples which are older than their window (now in seconds), e.g. when polls fail."""
+        for window in self.windows.values():
+            window.expire(now)
+
+    def count(self, series: str, window: str) -> int:
+        """Return the number of samples of a series in a window."""
+        return len(self.windows[(series, window)])
+
+    def get(self, series: str, window: str, statistic: str) -> float | None:
+        """Return "mean", "minimum" or "maximum" of a series over a window, None when it is empty."""
+        return getattr(self.windows[(series, window)], statistic)
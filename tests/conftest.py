@@ -0,0 +1,21 @@
+"""Fixtures for the Redback integration tests.
+
+Tests of the Home Assistant side use pytest-homeassistant-custom-component
+(see requirements_test.txt), and are skipped without it. The modules with no
+Home Assistant imports (redbacklib, scheduler, expression, window) are also
+imported on their own, from the package directory, as the benchmarks do.
+"""
+from importlib.util import find_spec
+from pathlib import Path
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "custom_components" / "redback"))
+
+if find_spec("pytest_homeassistant_custom_component") is not None:
+
+    @pytest.fixture(autouse=True)
+    def auto_enable_custom_integrations(enable_custom_integrations):
+        """Let Home Assistant load the integration from custom_components."""
+        yield
@@ -0,0 +1,106 @@
+"""Tests for the Redback coordinators."""
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.redback.const import DOMAIN, TIER_FAST, TIER_SLOW
+from custom_components.redback.coordinator import (
+    RedbackAccountCoordinator,
+    RedbackDataUpdateCoordinator,
+)
+
+ENTRY_DATA = {
+    "client_id": "client",
+    "auth": "secret",
+    "apimethod": "public",
+    "site_index": "First",
+    "site_id": "S1234123412341",
+    "displayname": "Redback",
+}
+
+
+@pytest.fixture
+async def coordinator(hass: HomeAssistant) -> RedbackDataUpdateCoordinator:
+    entry = MockConfigEntry(domain=DOMAIN, data=ENTRY_DATA, version=2)
+    entry.add_to_hass(hass)
+    coordinator = RedbackDataUpdateCoordinator(hass, entry)
+    coordinator.inverter_info = {"BatteryCapacitykWh": 14.2}
+    yield coordinator
+    await coordinator.async_shutdown()
+
+
+def listen(coordinator: RedbackDataUpdateCoordinator, calls: list[str], name: str, tier: str, keys: set[str] | None):
+    return coordinator.async_add_listener(lambda: calls.append(name), (tier, None if keys is None else frozenset(keys)))
+
+
+async def test_update_listeners_by_changed_key(coordinator: RedbackDataUpdateCoordinator) -> None:
+    calls: list[str] = []
+    listen(coordinator, calls, "pv", TIER_FAST, {"PV"})
+    listen(coordinator, calls, "load", TIER_FAST, {"Load"})
+    listen(coordinator, calls, "capacity", TIER_FAST, {"BatteryCapacitykWh"})
+    listen(coordinator, calls, "always", TIER_FAST, None)
+    listen(coordinator, calls, "temperature", TIER_SLOW, {"Temperature"})
+
+    # the first data updates every entity
+    coordinator.async_set_updated_data({"PV": 1.0, "Load": 2.0, "Temperature": 30})
+    assert sorted(calls) == ["always", "capacity", "load", "pv", "temperature"]
+
+    # then only those whose data keys changed, and the slow tier only when it is due
+    calls.clear()
+    coordinator.async_set_updated_data({"PV": 1.5, "Load": 2.0, "Temperature": 31})
+    assert sorted(calls) == ["always", "pv"]
+
+    calls.clear()
+    coordinator.inverter_info = {"BatteryCapacitykWh": 14.0}
+    coordinator.async_set_updated_data({"PV": 1.5, "Load": 2.0, "Temperature": 31})
+    assert sorted(calls) == ["always", "capacity"]
+
+    # the slow tier catches up with every change since it last updated
+    calls.clear()
+    coordinator._tier_updated[TIER_SLOW] -= coordinator.tier_intervals[TIER_SLOW]
+    coordinator.async_set_updated_data({"PV": 1.5, "Load": 2.0, "Temperature": 31})
+    assert sorted(calls) == ["always", "temperature"]
+
+
+async def test_update_listeners_after_failure(coordinator: RedbackDataUpdateCoordinator) -> None:
+    calls: list[str] = []
+    listen(coordinator, calls, "pv", TIER_FAST, {"PV"})
+    listen(coordinator, calls, "load", TIER_FAST, {"Load"})
+    coordinator.async_set_updated_data({"PV": 1.0, "Load": 2.0})
+
+    # a failure makes every entity unavailable, and recovery updates them all again
+    calls.clear()
+    coordinator.async_set_update_error(UpdateFailed("down"))
+    assert sorted(calls) == ["load", "pv"]
+    calls.clear()
+    coordinator.async_set_updated_data({"PV": 1.0, "Load": 2.0})
+    assert sorted(calls) == ["load", "pv"]
+
+
+async def test_update_listeners_when_stale_changes(coordinator: RedbackDataUpdateCoordinator) -> None:
+    calls: list[str] = []
+    listen(coordinator, calls, "pv", TIER_FAST, {"PV"})
+    coordinator.async_set_updated_data({"PV": 1.0})
+
+    calls.clear()
+    coordinator._async_set_stale(True)
+    assert calls == ["pv"]
+
+
+async def test_account_site_unexpected_error(hass: HomeAssistant, coordinator: RedbackDataUpdateCoordinator) -> None:
+    """An unexpected error fails the site, not the whole account."""
+    account = RedbackAccountCoordinator(hass, "client")
+    with patch.object(coordinator, "_async_update_data", side_effect=KeyError("Data")):
+        before = dt_util.utcnow()
+        await account._async_update_site(coordinator)
+    assert not coordinator.last_update_success
+    assert isinstance(coordinator.last_exception, UpdateFailed)
+    # polled again after the default interval, not straight away
+    assert coordinator.scheduler.next_poll >= before + coordinator.scheduler.default_interval
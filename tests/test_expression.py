@@ -0,0 +1,97 @@
+"""Tests for the calculated sensor expression engine (no Home Assistant needed)."""
+import pytest
+
+from expression import RedbackExpressionError, compile_calc, is_calc
+
+LOAD = "$calc$ float(ed['PvPowerInstantaneouskW']) + float(ed['BatteryPowerNegativeIsChargingkW'] if ed['BatteryPowerNegativeIsChargingkW'] else 0) - float(ed['ActiveExportedPowerInstantaneouskW']) + float(ed['ActiveImportedPowerInstantaneouskW'])"
+
+ED = {
+    "PvPowerInstantaneouskW": 4.0,
+    "BatteryPowerNegativeIsChargingkW": -1.0,
+    "ActiveExportedPowerInstantaneouskW": 0.5,
+    "ActiveImportedPowerInstantaneouskW": 0.0,
+    "Zero": 0,
+    "Null": None,
+    "Status": "OK",
+}
+
+
+def test_is_calc():
+    assert is_calc(LOAD)
+    assert not is_calc("PvPowerInstantaneouskW")
+
+
+def test_load_expression():
+    calc = compile_calc(LOAD)
+    assert calc(ED) == pytest.approx(2.5)
+    assert calc({**ED, "BatteryPowerNegativeIsChargingkW": None}) == pytest.approx(3.5)
+    assert calc.keys == {
+        "PvPowerInstantaneouskW",
+        "BatteryPowerNegativeIsChargingkW",
+        "ActiveExportedPowerInstantaneouskW",
+        "ActiveImportedPowerInstantaneouskW",
+    }
+
+
+def test_compiled_once():
+    assert compile_calc(LOAD) is compile_calc(LOAD)
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        ("1 + 2 * 3", 7),
+        ("-ed['PvPowerInstantaneouskW']", -4.0),
+        ("abs(ed['BatteryPowerNegativeIsChargingkW'])", 1.0),
+        ("max(ed['Zero'], 1, 2)", 2),
+        ("round(ed['PvPowerInstantaneouskW'] / 3, 2)", 1.33),
+        ("ed['Null'] or 5", 5),
+        ("ed['Zero'] and 5", 0),
+        ("1 if ed['PvPowerInstantaneouskW'] > 1 else 0", 1),
+        ("not ed['Null']", True),
+        ("ed['Null'] == 0", False),
+    ],
+)
+def test_supported_syntax(source, expected):
+    assert compile_calc(f"$calc$ {source}")(ED) == expected
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "ed['Null'] + 1",
+        "-ed['Missing']",
+        "ed['Null'] > 1",
+        "1 / ed['Zero']",
+        "float(ed['Status'])",
+        "abs(ed['Null'])",
+    ],
+)
+def test_unknown_for_a_bad_record(source):
+    assert compile_calc(f"$calc$ {source}")(ED) is None
+
+
+def test_missing_key_reads_as_none():
+    calc = compile_calc("$calc$ float(ed['Missing'])")
+    assert calc(ED) == 0.0
+    assert calc.unknown_keys(ED) == {"Missing"}
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "__import__('os')",
+        "ed.keys()",
+        "ed[0]",
+        "other['Key']",
+        "[1, 2]",
+        "lambda: 1",
+        "1 < 2 < 3",
+        "'text'",
+        "float(x=1)",
+        "1 +",
+    ],
+)
+def test_rejected_syntax(source):
+    with pytest.raises(RedbackExpressionError):
+        compile_calc(f"$calc$ {source}")
@@ -0,0 +1,72 @@
+"""Tests for the local energy integration."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from custom_components.redback.integration import RedbackIntegrator
+
+T0 = datetime(2024, 12, 10, 22, 0, tzinfo=timezone.utc)
+MAX_GAP = timedelta(minutes=5)
+
+
+def test_first_sample_starts_the_total():
+    integrator = RedbackIntegrator(MAX_GAP)
+    assert integrator.add(T0, 2.0)
+    assert integrator.total == 0.0
+    assert integrator.last_value == 2.0
+
+
+def test_trapezoidal_integration():
+    integrator = RedbackIntegrator(MAX_GAP)
+    integrator.add(T0, 2.0)
+    integrator.add(T0 + timedelta(minutes=1), 4.0)
+    integrator.add(T0 + timedelta(minutes=2), 4.0)
+    # (2 + 4) / 2 kW for a minute, then 4 kW for a minute
+    assert integrator.total == pytest.approx((3.0 + 4.0) / 60)
+
+
+def test_duplicate_and_out_of_order_samples_are_ignored():
+    integrator = RedbackIntegrator(MAX_GAP)
+    integrator.add(T0, 2.0)
+    integrator.add(T0 + timedelta(minutes=1), 2.0)
+    assert not integrator.add(T0 + timedelta(minutes=1), 100.0)
+    assert not integrator.add(T0 + timedelta(seconds=30), 100.0)
+    assert integrator.total == pytest.approx(2.0 / 60)
+    assert integrator.last_value == 2.0
+
+
+def test_gap_is_capped():
+    integrator = RedbackIntegrator(MAX_GAP)
+    integrator.add(T0, 6.0)
+    integrator.add(T0 + timedelta(hours=2), 6.0)
+    assert integrator.total == pytest.approx(6.0 * 5 / 60)
+
+
+def test_negative_power_reduces_the_total():
+    integrator = RedbackIntegrator(MAX_GAP)
+    integrator.add(T0, 1.0)
+    integrator.add(T0 + timedelta(minutes=1), -1.0)
+    assert integrator.total == pytest.approx(0.0)
+
+
+def test_round_trip():
+    integrator = RedbackIntegrator(MAX_GAP, last_reset=T0)
+    integrator.add(T0, 2.0)
+    integrator.add(T0 + timedelta(minutes=1), 4.0)
+    restored = RedbackIntegrator.from_dict(MAX_GAP, integrator.as_dict())
+    assert restored.total == integrator.total
+    assert restored.last_time == integrator.last_time
+    assert restored.last_value == integrator.last_value
+    assert restored.last_reset == T0
+    # carries on from where it left off
+    assert not restored.add(T0 + timedelta(minutes=1), 4.0)
+    assert restored.add(T0 + timedelta(minutes=2), 4.0)
+
+
+def test_restore_empty():
+    integrator = RedbackIntegrator.from_dict(MAX_GAP, {})
+    assert integrator.total == 0.0
+    assert integrator.last_time is None
+    assert integrator.last_reset is not None
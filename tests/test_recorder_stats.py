@@ -0,0 +1,55 @@
+"""Tests for the long-term statistics of the all-time counters."""
+from datetime import datetime, timezone
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from custom_components.redback.recorder_stats import hourly_statistics, statistic_id
+
+H22 = datetime(2024, 12, 10, 22, 0, tzinfo=timezone.utc)
+H23 = datetime(2024, 12, 10, 23, 0, tzinfo=timezone.utc)
+
+
+def record(timestamp: str, value):
+    return {"TimestampUtc": timestamp, "PvAllTimeEnergykWh": value}
+
+
+def test_statistic_id():
+    assert statistic_id("S1234", "PvAllTimeEnergykWh") == "redback:s1234_pv_total"
+
+
+def test_last_value_of_each_hour():
+    stats = hourly_statistics([
+        record("2024-12-10T22:10:00Z", 100.0),
+        record("2024-12-10T22:50:00Z", 101.5),
+        record("2024-12-10T23:05:00Z", 102.0),
+    ])
+    assert list(stats) == ["PvAllTimeEnergykWh"]
+    assert stats["PvAllTimeEnergykWh"] == [
+        {"start": H22, "state": 101.5, "sum": 101.5},
+        {"start": H23, "state": 102.0, "sum": 102.0},
+    ]
+
+
+@pytest.mark.parametrize("bad", [None, 0, 0.0, 50.0])
+def test_null_zero_and_decreasing_values_are_skipped(bad):
+    stats = hourly_statistics([
+        record("2024-12-10T22:10:00Z", 100.0),
+        record("2024-12-10T22:50:00Z", bad),
+        record("2024-12-10T23:05:00Z", bad),
+    ])
+    assert stats["PvAllTimeEnergykWh"] == [{"start": H22, "state": 100.0, "sum": 100.0}]
+
+
+def test_records_without_timestamp_are_skipped():
+    assert hourly_statistics([record(None, 100.0)]) == {}
+
+
+def test_last_carries_across_batches():
+    last: dict[str, float] = {}
+    hourly_statistics([record("2024-12-10T22:10:00Z", 100.0)], last)
+    assert last == {"PvAllTimeEnergykWh": 100.0}
+    assert hourly_statistics([record("2024-12-10T23:10:00Z", 90.0)], last) == {}
+    stats = hourly_statistics([record("2024-12-10T23:20:00Z", 100.5)], last)
+    assert stats["PvAllTimeEnergykWh"] == [{"start": H23, "state": 100.5, "sum": 100.5}]
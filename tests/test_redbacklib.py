@@ -0,0 +1,281 @@
+"""Tests for the Redback API library (no Home Assistant needed)."""
+import asyncio
+
+import pytest
+
+import redbacklib
+from redbacklib import (
+    RedbackAPIError,
+    RedbackCache,
+    RedbackCircuitBreaker,
+    RedbackConnectionError,
+    RedbackError,
+    normaliseDynamicData,
+)
+
+
+class FakeClock:
+    """Stands in for the time module in redbacklib."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(redbacklib, "time", clock)
+    return clock
+
+
+class Fetcher:
+    """A fetch() coroutine function returning 1, 2, 3... or raising the error it is given."""
+
+    def __init__(self):
+        self.calls = 0
+        self.error = None
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        return self.calls
+
+
+# RedbackCache
+
+def test_cache_fresh_value_is_not_fetched_again(clock):
+    async def run():
+        cache, fetch = RedbackCache(ttl=60), Fetcher()
+        assert await cache.get(fetch) == 1
+        clock.now += 59
+        assert await cache.get(fetch) == 1
+        assert await cache.get(fetch, forceRefresh=True) == 2
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    asyncio.run(run())
+
+
+def test_cache_stale_while_revalidate(clock):
+    async def run():
+        cache, fetch = RedbackCache(ttl=60, staleWhileRevalidate=30), Fetcher()
+        await cache.get(fetch)
+        clock.now += 70
+        # the stale value is served at once, and refreshed in the background
+        assert await cache.get(fetch) == 1
+        await asyncio.sleep(0.01)
+        assert fetch.calls == 2
+        assert await cache.get(fetch) == 2
+        assert cache.staleHits == 1
+        # beyond the stale-while-revalidate period the caller waits for the refresh
+        clock.now += 100
+        assert await cache.get(fetch) == 3
+
+    asyncio.run(run())
+
+
+def test_cache_background_failure_is_counted_once(clock):
+    async def run():
+        cache, fetch = RedbackCache(ttl=60, staleWhileRevalidate=30), Fetcher()
+        await cache.get(fetch)
+        clock.now += 70
+        fetch.error = RedbackError("down")
+        # several stale hits share one background refresh
+        for _ in range(3):
+            assert await cache.get(fetch) == 1
+        await asyncio.sleep(0.01)
+        assert fetch.calls == 2
+        assert cache.errors == 1
+
+    asyncio.run(run())
+
+
+def test_cache_stale_if_error(clock):
+    async def run():
+        cache, fetch = RedbackCache(ttl=60, staleIfError=300), Fetcher()
+        await cache.get(fetch)
+        clock.now += 200
+        fetch.error = RedbackConnectionError("down")
+        assert await cache.get(fetch) == 1
+        # too old to serve
+        clock.now += 200
+        with pytest.raises(RedbackConnectionError):
+            await cache.get(fetch)
+        assert cache.errors == 2
+
+    asyncio.run(run())
+
+
+def test_cache_never_hides_auth_errors(clock):
+    async def run():
+        cache, fetch = RedbackCache(ttl=60, staleIfError=300), Fetcher()
+        await cache.get(fetch)
+        clock.now += 70
+        fetch.error = RedbackAPIError("rejected")
+        with pytest.raises(RedbackAPIError):
+            await cache.get(fetch)
+
+    asyncio.run(run())
+
+
+def test_cache_concurrent_callers_share_one_fetch(clock):
+    async def run():
+        cache, fetch = RedbackCache(ttl=60), Fetcher()
+        assert await asyncio.gather(cache.get(fetch), cache.get(fetch)) == [1, 1]
+        assert fetch.calls == 1
+
+    asyncio.run(run())
+
+
+def test_cache_failed_refresh_does_not_extend_value(clock):
+    async def run():
+        cache, fetch = RedbackCache(ttl=60, staleIfError=300), Fetcher()
+        await cache.get(fetch)
+        clock.now += 100
+        fetch.error = RedbackError("down")
+        await cache.get(fetch)
+        assert cache.age() == 100
+
+    asyncio.run(run())
+
+
+# RedbackCircuitBreaker
+
+def failures(breaker, count):
+    for _ in range(count):
+        breaker.before()
+        breaker.failure()
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = RedbackCircuitBreaker("test")
+    failures(breaker, RedbackCircuitBreaker.failureThreshold - 1)
+    assert not breaker.isOpen
+    breaker.before()
+    breaker.success()
+    failures(breaker, RedbackCircuitBreaker.failureThreshold - 1)
+    assert not breaker.isOpen
+    failures(breaker, 1)
+    assert breaker.isOpen
+    with pytest.raises(RedbackConnectionError):
+        breaker.before()
+
+
+def test_breaker_probe_success_closes(clock):
+    breaker = RedbackCircuitBreaker("test")
+    failures(breaker, RedbackCircuitBreaker.failureThreshold)
+    clock.now += RedbackCircuitBreaker.resetTimeout
+    breaker.before()
+    # only one probe at a time
+    with pytest.raises(RedbackConnectionError):
+        breaker.before()
+    breaker.success()
+    assert not breaker.isOpen
+    breaker.before()
+
+
+def test_breaker_probe_failure_reopens(clock):
+    breaker = RedbackCircuitBreaker("test")
+    failures(breaker, RedbackCircuitBreaker.failureThreshold)
+    clock.now += RedbackCircuitBreaker.resetTimeout
+    breaker.before()
+    breaker.failure()
+    assert breaker.isOpen and not breaker.probing
+    with pytest.raises(RedbackConnectionError):
+        breaker.before()
+    clock.now += RedbackCircuitBreaker.resetTimeout
+    breaker.before()
+
+
+def test_breaker_abandoned_probe_can_be_retried(clock):
+    breaker = RedbackCircuitBreaker("test")
+    failures(breaker, RedbackCircuitBreaker.failureThreshold)
+    clock.now += RedbackCircuitBreaker.resetTimeout
+    breaker.before()
+    breaker.abandon()
+    breaker.before()
+    assert breaker.probing
+
+
+# normaliseDynamicData
+
+RECORD = {
+    "TimestampUtc": "2024-12-10T22:47:40Z",
+    "SiteId": "S1",
+    "Inverters": [],
+    "Phases": [
+        {"Id": "A", "ActiveExportedPowerInstantaneouskW": 0.5, "ActiveImportedPowerInstantaneouskW": 0, "VoltageInstantaneousV": 240.0, "CurrentInstantaneousA": 2.0, "PowerFactorInstantaneousMinus1to1": None},
+    ],
+    "PVs": [{"CurrentA": 10.0, "VoltageV": 400.0, "PowerkW": 4.0}],
+    "Battery": {"CurrentNegativeIsChargingA": -1.5, "VoltageV": 200.0, "Modules": []},
+    "PvPowerInstantaneouskW": 4.0,
+    "InverterTemperatureC": None,
+    "PvAllTimeEnergykWh": None,
+    "Status": "OK",
+}
+
+
+def test_normalise_flattens_sections():
+    snapshot = normaliseDynamicData(RECORD)
+    assert snapshot["VoltageInstantaneousV_A"] == 240.0
+    assert snapshot["CurrentInstantaneousA_A"] == 2.0
+    assert snapshot["VoltageInstantaneousV"] == 240.0
+    assert snapshot["ActiveExportedPowerInstantaneouskW"] == 0.5
+    assert snapshot["PV_0_PowerkW"] == 4.0
+    assert snapshot["BatteryCurrentNegativeIsChargingA"] == -1.5
+    assert "Phases" not in snapshot and "SiteId" not in snapshot
+    assert snapshot.timestamp == "2024-12-10T22:47:40Z"
+    assert snapshot.siteId == "S1"
+    assert [phase.id for phase in snapshot.phases] == ["A"]
+    assert len(snapshot.pvs) == 1
+    assert snapshot.battery.voltageV == 200.0
+
+
+def test_normalise_nulls():
+    snapshot = normaliseDynamicData(RECORD)
+    assert snapshot["InverterTemperatureC"] == 0
+    # a null all-time counter is not a zero reading
+    assert snapshot["PvAllTimeEnergykWh"] is None
+
+
+def test_normalise_null_sections():
+    snapshot = normaliseDynamicData({**RECORD, "PVs": None, "Battery": None})
+    assert snapshot["PvPowerInstantaneouskW"] == 4.0
+    assert snapshot.pvs == ()
+    assert snapshot.battery is None
+    assert "PV_0_PowerkW" not in snapshot
+    assert "BatteryVoltageV" not in snapshot
+
+
+def test_normalise_null_phases_totals():
+    snapshot = normaliseDynamicData({**RECORD, "Phases": None})
+    assert snapshot["VoltageInstantaneousV"] == 0
+    assert snapshot["ActiveImportedPowerInstantaneouskW"] == 0
+    assert "VoltageInstantaneousV_A" not in snapshot
+    assert snapshot.analytics == {}
+
+
+def test_normalise_missing_sections():
+    snapshot = normaliseDynamicData({"TimestampUtc": "2024-12-10T22:47:40Z", "PvPowerInstantaneouskW": None})
+    assert dict(snapshot) == {"TimestampUtc": "2024-12-10T22:47:40Z", "PvPowerInstantaneouskW": 0}
+    assert snapshot.battery is None
+
+
+def test_analytics_on_demand():
+    snapshot = normaliseDynamicData(RECORD)
+    assert "ActivePowerkW_A" not in snapshot
+    analytics = snapshot.analytics
+    assert analytics["ActivePowerkW_A"] == -0.5
+    assert analytics["ApparentPowerVA_A"] == 480.0
+    # no power factor reported: active over apparent power, within -1..1
+    assert analytics["PowerFactor_A"] == -1.0
+    assert analytics["ReactivePowervar_A"] == 0
+    assert analytics["NeutralCurrentA"] == 2.0
+    assert snapshot.analytics is analytics
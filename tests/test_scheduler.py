@@ -0,0 +1,138 @@
+"""Tests for the poll scheduler (no Home Assistant needed)."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from scheduler import RedbackPollScheduler, site_is_active
+
+T0 = datetime(2024, 12, 10, 22, 0, tzinfo=timezone.utc)
+CADENCE = timedelta(seconds=60)
+LAG = timedelta(seconds=20)
+
+
+def seconds(value: float) -> timedelta:
+    return timedelta(seconds=value)
+
+
+@pytest.fixture
+def scheduler() -> RedbackPollScheduler:
+    return RedbackPollScheduler(CADENCE, seconds(10), 3, seconds(3), seconds(60), seconds(300))
+
+
+def latest_record(now: datetime) -> datetime:
+    """The cloud uploads a record every minute, available LAG after its timestamp."""
+    return T0 + CADENCE * ((now - T0 - LAG) // CADENCE)
+
+
+def run(scheduler: RedbackPollScheduler, polls: int, active: bool = True, now: datetime | None = None) -> datetime:
+    now = now or T0 + seconds(25)
+    for _ in range(polls):
+        scheduler.record(latest_record(now), now, active)
+        now = scheduler.next_poll
+    return now
+
+
+def test_first_record_is_new(scheduler):
+    assert scheduler.record(T0, T0 + seconds(25))
+    assert scheduler.last_timestamp == T0
+    assert scheduler.next_poll > T0 + seconds(25)
+
+
+def test_locks_onto_upload_phase(scheduler):
+    now = run(scheduler, 20)
+    assert scheduler.cadence == CADENCE
+    # polls settle just after each record becomes available (within a retry interval)
+    assert LAG <= (now - T0) % CADENCE <= LAG + seconds(10) + scheduler.margin
+    assert LAG <= scheduler.lag <= LAG + seconds(10)
+
+
+def test_record_not_advanced_retries(scheduler):
+    now = T0 + seconds(25)
+    scheduler.record(T0, now)
+    now += seconds(30)
+    assert not scheduler.record(T0, now)
+    assert scheduler.next_poll == now + seconds(10)
+    for _ in range(3):
+        scheduler.record(T0, now)
+    # out of retries, wait for the next record
+    assert scheduler.next_poll == now + CADENCE
+
+
+def test_retry_relearns_longer_lag(scheduler):
+    now = run(scheduler, 10)
+    # uploads now arrive 15s later than before
+    timestamp = scheduler.last_timestamp + CADENCE
+    assert not scheduler.record(timestamp - CADENCE, now)
+    now += seconds(10)
+    assert not scheduler.record(timestamp - CADENCE, now)
+    now += seconds(10)
+    assert scheduler.record(timestamp, now)
+    assert scheduler.lag == now - timestamp
+
+
+def test_idle_doubles_stride_up_to_ceiling(scheduler):
+    run(scheduler, 3)
+    assert scheduler.stride == 1
+    now = run(scheduler, 10, active=False)
+    assert scheduler.stride == 5
+    assert scheduler.current_interval == seconds(300)
+    # activity returns to every record
+    scheduler.record(latest_record(now), now, True)
+    assert scheduler.stride == 1
+
+
+def test_idle_probe_too_early_keeps_phase(scheduler):
+    now = run(scheduler, 20, active=False)
+    lag = scheduler.lag
+    expected = scheduler.expected_timestamp
+    # a probe just before the expected record gets the one before it
+    assert scheduler.record(expected - CADENCE, now - seconds(5), False)
+    assert scheduler.lag == lag
+    assert scheduler.next_poll == now - seconds(5) + seconds(10)
+    assert scheduler.record(expected, now + seconds(5), False)
+    assert scheduler.lag <= lag + seconds(5)
+
+
+def test_idle_lag_stays_steady(scheduler):
+    run(scheduler, 200, active=False)
+    assert scheduler.lag < LAG + seconds(5)
+
+
+def test_no_timestamp_polls_at_adaptive_interval(scheduler):
+    now = T0
+    assert scheduler.record(None, now)
+    assert scheduler.next_poll == now + CADENCE
+    scheduler.record(None, now, False)
+    assert scheduler.next_poll == now + 2 * CADENCE
+
+
+def test_failed_polls_after_default_interval(scheduler):
+    scheduler.failed(T0)
+    assert scheduler.next_poll == T0 + CADENCE
+    assert scheduler.expected_timestamp is None
+
+
+def test_interval(scheduler):
+    assert scheduler.interval(T0) == CADENCE
+    scheduler.record(T0, T0 + seconds(25))
+    assert scheduler.interval(scheduler.next_poll - seconds(30)) == seconds(30)
+    # never less than a second, even when overdue
+    assert scheduler.interval(scheduler.next_poll + seconds(30)) == seconds(1)
+
+
+def test_is_due(scheduler):
+    assert scheduler.is_due(T0)
+    scheduler.record(T0, T0 + seconds(25))
+    assert not scheduler.is_due(scheduler.next_poll - seconds(2))
+    assert scheduler.is_due(scheduler.next_poll - seconds(1))
+
+
+def test_site_is_active():
+    idle = {"PvPowerInstantaneouskW": 0, "BatteryPowerNegativeIsChargingkW": 0.2}
+    assert site_is_active(None, idle, 0.05, 0.1)
+    assert not site_is_active(idle, idle, 0.05, 0.1)
+    assert site_is_active(idle, {**idle, "PvPowerInstantaneouskW": 0.1}, 0.05, 0.1)
+    assert site_is_active(idle, {**idle, "BatteryPowerNegativeIsChargingkW": 0.5}, 0.05, 0.1)
+    # private API readings are in W
+    assert site_is_active({"ACLoadW": 100}, {"ACLoadW": 300}, 0.05, 0.1)
+    assert not site_is_active({"ACLoadW": None}, {"ACLoadW": 50}, 0.05, 0.1)
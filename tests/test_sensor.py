@@ -0,0 +1,52 @@
+"""Tests for the Redback sensors."""
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.redback.const import DOMAIN
+
+ENTRY_DATA = {
+    "client_id": "client",
+    "auth": "secret",
+    "apimethod": "public",
+    "site_index": "First",
+    "site_id": "S1234123412341",
+    "displayname": "Redback",
+}
+
+
+@pytest.fixture
+async def setup_entry(recorder_mock, hass: HomeAssistant) -> MockConfigEntry:
+    """Set up a config entry with no stored metadata, served by the sample data of TestRedbackInverter."""
+    entry = MockConfigEntry(domain=DOMAIN, data=ENTRY_DATA, version=2)
+    entry.add_to_hass(hass)
+    with patch("custom_components.redback.coordinator.TEST_MODE", True):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+    yield entry
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_first_setup_sets_every_sensor(hass: HomeAssistant, setup_entry: MockConfigEntry) -> None:
+    """The first refresh runs before the entities exist, they must still start from its data."""
+    # values which would not change again: from inverter info, and a status
+    assert hass.states.get("sensor.redback_status").state == "OK"
+    assert float(hass.states.get("sensor.redback_battery_capacity").state) > 0
+    assert float(hass.states.get("sensor.redback_solar_generation").state) == pytest.approx(1.416)
+    # every enabled sensor has a value (the rolling statistics are disabled by default)
+    for state in hass.states.async_all("sensor"):
+        assert state.state not in (STATE_UNKNOWN, STATE_UNAVAILABLE), state.entity_id
+
+
+async def test_unchanged_sensor_keeps_its_value(hass: HomeAssistant, setup_entry: MockConfigEntry) -> None:
+    """A refresh which changes nothing leaves the sensors as they are."""
+    coordinator = hass.data[DOMAIN][setup_entry.entry_id]
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.redback_status").state == "OK"
@@ -0,0 +1,114 @@
+"""Tests for the rolling window statistics (no Home Assistant needed)."""
+import random
+
+import pytest
+
+from window import MIN_SAMPLE_INTERVAL, RedbackRollingStats, RollingWindow
+
+
+def test_empty_window():
+    window = RollingWindow(300, 12)
+    assert len(window) == 0
+    assert window.mean is None
+    assert window.minimum is None
+    assert window.maximum is None
+
+
+def test_mean_minimum_maximum():
+    window = RollingWindow(300, 12)
+    for timestamp, value in ((0, 2.0), (60, -1.0), (120, 5.0)):
+        assert window.add(timestamp, value)
+    assert len(window) == 3
+    assert window.mean == pytest.approx(2.0)
+    assert window.minimum == -1.0
+    assert window.maximum == 5.0
+
+
+def test_duplicate_and_out_of_order_samples_are_ignored():
+    window = RollingWindow(300, 12)
+    window.add(60, 1.0)
+    assert not window.add(60, 9.0)
+    assert not window.add(30, 9.0)
+    assert window.maximum == 1.0
+
+
+def test_old_samples_expire_as_new_ones_arrive():
+    window = RollingWindow(300, 12)
+    window.add(0, 10.0)
+    window.add(100, 1.0)
+    window.add(300, 2.0)
+    # the sample at 0 is no longer within 300s of the newest
+    assert len(window) == 2
+    assert window.maximum == 2.0
+    assert window.mean == pytest.approx(1.5)
+
+
+def test_expire_without_new_samples():
+    window = RollingWindow(300, 12)
+    window.add(0, 10.0)
+    window.add(100, 1.0)
+    window.expire(350)
+    assert window.maximum == 1.0
+    window.expire(400)
+    assert len(window) == 0
+    assert window.mean is None
+    # a window emptied by expiry takes new samples again
+    assert window.add(500, 3.0)
+    assert window.mean == 3.0
+
+
+def test_full_buffer_drops_oldest():
+    window = RollingWindow(3600, 4)
+    for timestamp in range(6):
+        window.add(timestamp, float(timestamp))
+    assert len(window) == 4
+    assert window.minimum == 2.0
+    assert window.mean == pytest.approx(3.5)
+
+
+def test_matches_brute_force():
+    rng = random.Random(1)
+    window = RollingWindow(300, 300 // MIN_SAMPLE_INTERVAL + 2)
+    samples = []
+    timestamp = 0
+    for _ in range(2000):
+        timestamp += rng.choice((30, 60, 60, 60, 120, 400))
+        value = rng.uniform(-5, 5)
+        window.add(timestamp, value)
+        samples.append((timestamp, value))
+        recent = [v for t, v in samples if t > timestamp - 300][-window.capacity:]
+        assert len(window) == len(recent)
+        assert window.mean == pytest.approx(sum(recent) / len(recent))
+        assert window.minimum == min(recent)
+        assert window.maximum == max(recent)
+
+
+def test_rolling_stats():
+    stats = RedbackRollingStats()
+    public = {
+        "PvPowerInstantaneouskW": 3.0,
+        "BatteryPowerNegativeIsChargingkW": -1.0,
+        "ActiveExportedPowerInstantaneouskW": 0.5,
+        "ActiveImportedPowerInstantaneouskW": 0.0,
+    }
+    stats.add(0, public)
+    stats.add(60, {**public, "PvPowerInstantaneouskW": 5.0})
+    assert stats.get("pv", "5m", "mean") == pytest.approx(4.0)
+    assert stats.get("pv", "1h", "maximum") == 5.0
+    assert stats.get("grid", "5m", "minimum") == -0.5
+    assert stats.get("load", "5m", "minimum") == pytest.approx(1.5)
+    assert stats.count("battery", "5m") == 2
+    # the 5 minute windows empty while the hour ones still hold the samples
+    stats.expire(60 + 300)
+    assert stats.count("pv", "5m") == 0
+    assert stats.get("pv", "5m", "mean") is None
+    assert stats.count("pv", "1h") == 2
+
+
+def test_rolling_stats_private_api():
+    stats = RedbackRollingStats()
+    stats.add(0, {"PVW": 2000, "ACLoadW": 1500, "GridNegativeIsImportW": -700, "BatteryNegativeIsChargingW": None})
+    assert stats.get("pv", "5m", "mean") == 2.0
+    assert stats.get("load", "5m", "mean") == 1.5
+    assert stats.get("grid", "5m", "mean") == pytest.approx(0.7)
+    assert stats.get("battery", "5m", "mean") == 0